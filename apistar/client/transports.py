@@ -2,7 +2,7 @@ import mimetypes
 
 import requests
 
-from apistar import codecs, conneg, exceptions
+from apistar import codecs, conneg, exceptions, jsonbackends
 from apistar.client.utils import (
     BlockAllCookies, File, ForceMultiPartDict, guess_filename, is_file
 )
@@ -70,7 +70,8 @@ class HTTPTransport(BaseTransport):
 
         if content is not None:
             if encoding == 'application/json':
-                options['json'] = content
+                options['data'] = jsonbackends.dumps(content)
+                options['headers']['Content-Type'] = 'application/json'
             elif encoding == 'multipart/form-data':
                 data = {}
                 files = ForceMultiPartDict()
@@ -4,5 +4,13 @@ class BaseCodec:
     def decode(self, bytestring, **options):
         raise NotImplementedError()
 
+    def decode_file(self, file, **options):
+        """
+        Decode the content of a binary file-like object. Codecs that are able
+        to parse their input incrementally may override this, rather than
+        reading the whole of the file into memory.
+        """
+        return self.decode(file.read(), **options)
+
     def encode(self, item, **options):
         raise NotImplementedError()
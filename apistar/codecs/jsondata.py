@@ -1,6 +1,4 @@
-import collections
-import json
-
+from apistar import jsonbackends
 from apistar.codecs.base import BaseCodec
 from apistar.exceptions import ParseError
 
@@ -14,9 +12,6 @@ class JSONCodec(BaseCodec):
         Return raw JSON data.
         """
         try:
-            return json.loads(
-                bytestring.decode('utf-8'),
-                object_pairs_hook=collections.OrderedDict
-            )
+            return jsonbackends.loads(bytestring)
         except ValueError as exc:
             raise ParseError('Malformed JSON. %s' % exc) from None
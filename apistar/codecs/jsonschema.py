@@ -1,6 +1,4 @@
-import json
-
-from apistar import types, validators
+from apistar import jsonbackends, types, validators
 from apistar.codecs.base import BaseCodec
 from apistar.compat import dict_type
 from apistar.exceptions import ParseError
@@ -185,10 +183,7 @@ class JSONSchemaCodec(BaseCodec):
 
     def decode(self, bytestring, **options):
         try:
-            data = json.loads(
-                bytestring.decode('utf-8'),
-                object_pairs_hook=dict_type
-            )
+            data = jsonbackends.loads(bytestring)
         except ValueError as exc:
             raise ParseError('Malformed JSON. %s' % exc) from None
         jsonschema = JSON_SCHEMA.validate(data)
@@ -205,20 +200,7 @@ class JSONSchemaCodec(BaseCodec):
         if options.get('to_data_structure'):
             return struct
 
-        indent = options.get('indent')
-        if indent:
-            kwargs = {
-                'ensure_ascii': False,
-                'indent': 4,
-                'separators': (',', ': ')
-            }
-        else:
-            kwargs = {
-                'ensure_ascii': False,
-                'indent': None,
-                'separators': (',', ':')
-            }
-        return json.dumps(struct, **kwargs).encode('utf-8')
+        return jsonbackends.dumps(struct, indent=bool(options.get('indent')))
 
     def encode_to_data_structure(self, item, defs=None, def_prefix=None, is_def=False):
         if issubclass(item, types.Type):
@@ -12,17 +12,20 @@ class MultiPartCodec(BaseCodec):
     media_type = 'multipart/form-data'
 
     def decode(self, bytestring, headers, **options):
-        try:
-            content_length = max(0, int(headers['content-length']))
-        except (KeyError, ValueError, TypeError):
-            content_length = None
+        return self.decode_file(BytesIO(bytestring), headers, **options)
+
+    def decode_file(self, file, headers, content_length=None, **options):
+        if content_length is None:
+            try:
+                content_length = max(0, int(headers['content-length']))
+            except (KeyError, ValueError, TypeError):
+                content_length = None
 
         try:
             mime_type, mime_options = parse_options_header(headers['content-type'])
         except KeyError:
             mime_type, mime_options = '', {}
 
-        body_file = BytesIO(bytestring)
         parser = FormDataParser()
-        stream, form, files = parser.parse(body_file, mime_type, content_length, mime_options)
+        stream, form, files = parser.parse(file, mime_type, content_length, mime_options)
         return ImmutableMultiDict(chain(form.items(multi=True), files.items(multi=True)))
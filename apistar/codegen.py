@@ -0,0 +1,73 @@
+import linecache
+from contextlib import contextmanager
+
+
+class CodeBuilder():
+    """
+    Accumulates the source of a generated Python function, along with the
+    namespace of constants that the generated code refers to.
+    """
+
+    def __init__(self, filename='<generated>'):
+        self.filename = filename
+        self.lines = []
+        self.namespace = {}
+        self._indent = 0
+        self._constants = {}
+        self._counters = {}
+
+    def line(self, text=''):
+        self.lines.append(('    ' * self._indent + text) if text else '')
+
+    @contextmanager
+    def block(self, header):
+        self.line(header)
+        self._indent += 1
+        try:
+            yield
+        finally:
+            self._indent -= 1
+
+    def name(self, prefix):
+        """
+        Return a new unique local variable name.
+        """
+        count = self._counters.get(prefix, 0)
+        self._counters[prefix] = count + 1
+        return '%s_%d' % (prefix, count)
+
+    def const(self, value, prefix='const'):
+        """
+        Make `value` available to the generated code, returning the global
+        name that refers to it.
+        """
+        key = id(value)
+        if key in self._constants:
+            return self._constants[key]
+        name = self.name(prefix)
+        self.namespace[name] = value
+        self._constants[key] = name
+        return name
+
+    @property
+    def source(self):
+        return '\n'.join(self.lines) + '\n'
+
+    def build(self, name):
+        """
+        Execute the accumulated source, and return the object it defines
+        as `name`.
+
+        The source is registered with `linecache`, so that tracebacks through
+        generated code remain readable.
+        """
+        source = self.source
+        code = compile(source, self.filename, 'exec')
+        linecache.cache[self.filename] = (
+            len(source), None, source.splitlines(True), self.filename
+        )
+        namespace = dict(self.namespace)
+        exec(code, namespace)
+        function = namespace[name]
+        function.__source__ = source
+        return function
@@ -19,6 +19,24 @@ except ImportError:
     jinja2 = None
 
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+try:
+    import rapidjson
+except ImportError:
+    rapidjson = None
+
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
 try:
     import whitenoise
 except ImportError:
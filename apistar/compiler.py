@@ -0,0 +1,490 @@
+"""
+Compiles a validator tree into a single specialized Python function.
+
+Validators are configured once and then used many times, so rather than
+walking every `if self.<constraint> is not None` check on each call we
+generate source code that only includes the checks that are actually set,
+with any child validators inlined into the parent.
+
+The generated function has the same signature and behavior as the
+validator's `validate()` method.
+"""
+import re
+from collections.abc import Mapping
+from math import isfinite
+
+from apistar import validators
+from apistar.codegen import CodeBuilder
+from apistar.compat import dict_type
+from apistar.exceptions import ValidationError
+
+
+def compile_validator(validator):
+    builder = CodeBuilder(filename='<compiled %s at %#x>' % (
+        type(validator).__name__, id(validator)
+    ))
+    builder.namespace.update({
+        'ValidationError': ValidationError,
+        'Mapping': Mapping,
+        'dict_type': dict_type,
+        'isfinite': isfinite,
+        'Uniqueness': validators.Uniqueness,
+        'validate_ref': validate_ref,
+    })
+    defs = 'definitions' if needs_definitions(validator) else None
+    with builder.block('def validate(value, definitions=None, allow_coerce=False):'):
+        emit(builder, validator, 'value', 'result', defs)
+        builder.line('return result')
+    return builder.build('validate')
+
+
+def validate_ref(ref, value, definitions, allow_coerce):
+    assert definitions is not None, 'Ref.validate() requires definitions'
+    assert ref in definitions, 'Ref "%s" not in definitions' % ref
+
+    child_schema = definitions[ref]
+    if isinstance(child_schema, validators.Validator):
+        return child_schema.compile()(value, definitions, allow_coerce)
+    return child_schema.validate(
+        value,
+        definitions=definitions,
+        allow_coerce=allow_coerce
+    )
+
+
+def get_emitter(validator):
+    """
+    Return the emitter for the class that implements `validator.validate()`,
+    or `None` if the validator must be called as-is.
+    """
+    if not isinstance(validator, validators.Validator):
+        return None
+    for cls in type(validator).__mro__:
+        if 'validate' in cls.__dict__:
+            return EMITTERS.get(cls)
+    return None
+
+
+def get_children(validator):
+    if isinstance(validator, validators.Object):
+        children = list(validator.properties.values())
+        children += list(validator.pattern_properties.values())
+        if validator.additional_properties not in (None, True, False):
+            children.append(validator.additional_properties)
+        return children
+    elif isinstance(validator, validators.Array):
+        if isinstance(validator.items, list):
+            children = list(validator.items)
+        elif validator.items is not None:
+            children = [validator.items]
+        else:
+            children = []
+        if isinstance(validator.additional_items, validators.Validator):
+            children.append(validator.additional_items)
+        return children
+    elif isinstance(validator, validators.Union):
+        return list(validator.items)
+    return []
+
+
+def needs_definitions(validator):
+    """
+    Definitions are only ever consumed by `Ref`, or by validators we cannot
+    inline, so for most trees we can skip building them entirely.
+    """
+    emitter = get_emitter(validator)
+    if emitter is None or emitter is emit_ref:
+        return True
+    return any(needs_definitions(child) for child in get_children(validator))
+
+
+def emit(builder, validator, value, target, defs):
+    """
+    Emit code that validates the expression `value`, assigning the
+    result to `target`, or raising `ValidationError`.
+    """
+    emitter = get_emitter(validator)
+    if emitter is None:
+        emit_call(builder, validator, value, target, defs)
+    else:
+        emitter(builder, validator, value, target, defs)
+
+
+def error(builder, validator, code, **context):
+    """
+    Return a statement raising the given error. Messages are rendered ahead
+    of time, since the validator configuration is fixed.
+    """
+    try:
+        message = validator.error_message(code, **context)
+    except KeyError:
+        # Defer to the validator, so that we fail in exactly the same way.
+        return '%s(%r)' % (builder.const(validator.error, 'error'), code)
+    return 'raise ValidationError(%s)' % builder.const(message, 'message')
+
+
+def message(builder, validator, code, **context):
+    return builder.const(validator.error_message(code, **context), 'message')
+
+
+def emit_null(builder, validator, value, target):
+    with builder.block('if %s is None:' % value):
+        if validator.allow_null:
+            builder.line('%s = None' % target)
+        else:
+            builder.line(error(builder, validator, 'null'))
+
+
+def emit_enum(builder, validator, value):
+    if validator.enum is None:
+        return
+    with builder.block('if %s not in %s:' % (value, builder.const(frozenset(validator.enum), 'enum'))):
+        builder.line(error(builder, validator, 'exact' if len(validator.enum) == 1 else 'enum'))
+
+
+def emit_call(builder, validator, value, target, defs):
+    builder.line('%s = %s.validate(%s, definitions=%s, allow_coerce=allow_coerce)' % (
+        target, builder.const(validator, 'validator'), value, defs
+    ))
+
+
+def emit_any(builder, validator, value, target, defs):
+    builder.line('%s = %s' % (target, value))
+
+
+def emit_ref(builder, validator, value, target, defs):
+    builder.line('%s = validate_ref(%r, %s, %s, allow_coerce)' % (
+        target, validator.ref, value, defs
+    ))
+
+
+def emit_string(builder, validator, value, target, defs):
+    format = validators.FORMATS.get(validator.format)
+
+    emit_null(builder, validator, value, target)
+    if format is not None:
+        with builder.block('elif %s(%s):' % (builder.const(format.is_native_type, 'is_native'), value)):
+            builder.line('%s = %s' % (target, value))
+
+    with builder.block('else:'):
+        with builder.block('if not isinstance(%s, str):' % value):
+            builder.line(error(builder, validator, 'type'))
+
+        emit_enum(builder, validator, value)
+
+        if validator.min_length is not None:
+            code = 'blank' if validator.min_length == 1 else 'min_length'
+            with builder.block('if len(%s) < %d:' % (value, validator.min_length)):
+                builder.line(error(builder, validator, code))
+
+        if validator.max_length is not None:
+            with builder.block('if len(%s) > %d:' % (value, validator.max_length)):
+                builder.line(error(builder, validator, 'max_length'))
+
+        if validator.pattern is not None:
+            pattern = builder.const(re.compile(validator.pattern), 'pattern')
+            with builder.block('if not %s.search(%s):' % (pattern, value)):
+                builder.line(error(builder, validator, 'pattern'))
+
+        if format is not None:
+            builder.line('%s = %s(%s)' % (target, builder.const(format.validate, 'format'), value))
+        else:
+            builder.line('%s = %s' % (target, value))
+
+
+def emit_numeric(builder, validator, value, target, defs):
+    numeric_type = validator.numeric_type
+    number = builder.name('number')
+
+    emit_null(builder, validator, value, target)
+    with builder.block('else:'):
+        with builder.block('if isinstance(%s, bool):' % value):
+            builder.line(error(builder, validator, 'type'))
+        if numeric_type is int:
+            with builder.block('elif isinstance(%s, float) and not %s.is_integer():' % (value, value)):
+                builder.line(error(builder, validator, 'integer'))
+        with builder.block('elif not isinstance(%s, (int, float)) and not allow_coerce:' % value):
+            builder.line(error(builder, validator, 'type'))
+        with builder.block('elif isinstance(%s, float) and not isfinite(%s):' % (value, value)):
+            builder.line(error(builder, validator, 'finite'))
+
+        if numeric_type in (int, float):
+            # Skip the conversion when we already have the exact type.
+            with builder.block('if type(%s) is %s:' % (value, numeric_type.__name__)):
+                builder.line('%s = %s' % (number, value))
+            with builder.block('else:'):
+                emit_conversion(builder, validator, value, number)
+        else:
+            emit_conversion(builder, validator, value, number)
+
+        emit_enum(builder, validator, number)
+
+        if validator.minimum is not None:
+            minimum = builder.const(validator.minimum, 'minimum')
+            if validator.exclusive_minimum:
+                with builder.block('if %s <= %s:' % (number, minimum)):
+                    builder.line(error(builder, validator, 'exclusive_minimum'))
+            else:
+                with builder.block('if %s < %s:' % (number, minimum)):
+                    builder.line(error(builder, validator, 'minimum'))
+
+        if validator.maximum is not None:
+            maximum = builder.const(validator.maximum, 'maximum')
+            if validator.exclusive_maximum:
+                with builder.block('if %s >= %s:' % (number, maximum)):
+                    builder.line(error(builder, validator, 'exclusive_maximum'))
+            else:
+                with builder.block('if %s > %s:' % (number, maximum)):
+                    builder.line(error(builder, validator, 'maximum'))
+
+        if validator.multiple_of is not None:
+            multiple_of = validator.multiple_of
+            if isinstance(multiple_of, float) and multiple_of:
+                condition = 'not (%s * %s).is_integer()' % (number, builder.const(1 / multiple_of, 'reciprocal'))
+            elif isinstance(multiple_of, float):
+                condition = 'not (%s * (1 / %s)).is_integer()' % (number, builder.const(multiple_of, 'multiple_of'))
+            else:
+                condition = '%s %% %s' % (number, builder.const(multiple_of, 'multiple_of'))
+            with builder.block('if %s:' % condition):
+                builder.line(error(builder, validator, 'multiple_of'))
+
+        builder.line('%s = %s' % (target, number))
+
+
+def emit_conversion(builder, validator, value, number):
+    with builder.block('try:'):
+        builder.line('%s = %s(%s)' % (number, builder.const(validator.numeric_type, 'numeric_type'), value))
+    with builder.block('except (TypeError, ValueError):'):
+        builder.line(error(builder, validator, 'type'))
+
+
+def emit_boolean(builder, validator, value, target, defs):
+    values = dict(validator.values)
+    if validator.allow_null:
+        values.update(validator.null_values)
+    values = builder.const(values, 'values')
+
+    emit_null(builder, validator, value, target)
+    with builder.block('elif isinstance(%s, bool):' % value):
+        builder.line('%s = %s' % (target, value))
+    with builder.block('elif allow_coerce and isinstance(%s, str) and %s.lower() in %s:' % (value, value, values)):
+        builder.line('%s = %s[%s.lower()]' % (target, values, value))
+    with builder.block('else:'):
+        builder.line(error(builder, validator, 'type'))
+
+
+def emit_definitions(builder, validator, defs):
+    if defs is None:
+        return None
+    child_defs = builder.name('definitions')
+    builder.line('%s = %s.get_definitions(%s)' % (
+        child_defs, builder.const(validator, 'validator'), defs
+    ))
+    return child_defs
+
+
+def emit_child(builder, validator, value, target, errors, key, defs):
+    """
+    Validate a child item, collecting any error against `key`.
+    """
+    child_value = builder.name('value')
+    item = builder.name('item')
+    builder.line('%s = %s' % (child_value, value))
+    with builder.block('try:'):
+        emit(builder, validator, child_value, item, defs)
+        builder.line('%s = %s' % (target, item))
+    with builder.block('except ValidationError as exc:'):
+        builder.line('%s[%s] = exc.detail' % (errors, key))
+
+
+def emit_object(builder, validator, value, target, defs):
+    validated = builder.name('validated')
+    errors = builder.name('errors')
+    key = builder.name('key')
+
+    emit_null(builder, validator, value, target)
+    with builder.block('elif not isinstance(%s, (dict, Mapping)):' % value):
+        builder.line(error(builder, validator, 'type'))
+
+    with builder.block('else:'):
+        defs = emit_definitions(builder, validator, defs)
+        builder.line('%s = dict_type()' % validated)
+        builder.line('%s = {}' % errors)
+
+        # Ensure all property keys are strings.
+        with builder.block('for %s in %s.keys():' % (key, value)):
+            with builder.block('if not isinstance(%s, str):' % key):
+                builder.line('%s[%s] = %s' % (errors, key, message(builder, validator, 'invalid_key')))
+
+        # Min/Max properties
+        if validator.min_properties is not None:
+            code = 'empty' if validator.min_properties == 1 else 'min_properties'
+            with builder.block('if len(%s) < %d:' % (value, validator.min_properties)):
+                builder.line(error(builder, validator, code))
+        if validator.max_properties is not None:
+            with builder.block('if len(%s) > %d:' % (value, validator.max_properties)):
+                builder.line(error(builder, validator, 'max_properties'))
+
+        # Required properties
+        for name in validator.required:
+            with builder.block('if %r not in %s:' % (name, value)):
+                builder.line('%s[%r] = %s' % (
+                    errors, name, message(builder, validator, 'required', field_name=name)
+                ))
+
+        # Properties
+        for name, child_schema in validator.properties.items():
+            with builder.block('if %r in %s:' % (name, value)):
+                emit_child(
+                    builder, child_schema, '%s[%r]' % (value, name),
+                    '%s[%r]' % (validated, name), errors, repr(name), defs
+                )
+            if child_schema.has_default():
+                with builder.block('else:'):
+                    builder.line('%s[%r] = %s' % (
+                        validated, name, builder.const(child_schema.default, 'default')
+                    ))
+
+        # Pattern properties
+        if validator.pattern_properties:
+            with builder.block('for %s in list(%s.keys()):' % (key, value)):
+                with builder.block('if isinstance(%s, str):' % key):
+                    for pattern, child_schema in validator.pattern_properties.items():
+                        pattern = builder.const(re.compile(pattern), 'pattern')
+                        with builder.block('if %s.search(%s):' % (pattern, key)):
+                            emit_child(
+                                builder, child_schema, '%s[%s]' % (value, key),
+                                '%s[%s]' % (validated, key), errors, key, defs
+                            )
+
+        # Additional properties
+        additional_properties = validator.additional_properties
+        if additional_properties is not None:
+            remaining = builder.name('remaining')
+            builder.line('%s = %s.keys() | %s.keys()' % (remaining, validated, errors))
+            with builder.block('for %s in [%s for %s in %s.keys() if %s not in %s]:' % (
+                key, key, key, value, key, remaining
+            )):
+                if additional_properties is True:
+                    builder.line('%s[%s] = %s[%s]' % (validated, key, value, key))
+                elif additional_properties is False:
+                    builder.line('%s[%s] = %s' % (errors, key, message(builder, validator, 'invalid_property')))
+                else:
+                    emit_child(
+                        builder, additional_properties, '%s[%s]' % (value, key),
+                        '%s[%s]' % (validated, key), errors, key, defs
+                    )
+
+        with builder.block('if %s:' % errors):
+            builder.line('raise ValidationError(%s)' % errors)
+        builder.line('%s = %s' % (target, validated))
+
+
+def emit_array(builder, validator, value, target, defs):
+    validated = builder.name('validated')
+    errors = builder.name('errors')
+    seen_items = builder.name('seen_items')
+    min_items = validator.min_items
+    max_items = validator.max_items
+    items = validator.items
+
+    emit_null(builder, validator, value, target)
+    with builder.block('elif not isinstance(%s, list):' % value):
+        builder.line(error(builder, validator, 'type'))
+
+    with builder.block('else:'):
+        defs = emit_definitions(builder, validator, defs)
+        builder.line('%s = []' % validated)
+
+        if min_items is not None and min_items == max_items:
+            with builder.block('if len(%s) != %d:' % (value, min_items)):
+                builder.line(error(builder, validator, 'exact_items'))
+
+        checks = []
+        if min_items is not None:
+            checks.append(('len(%s) < %d' % (value, min_items), 'empty' if min_items == 1 else 'min_items'))
+        if max_items is not None:
+            checks.append(('len(%s) > %d' % (value, max_items), 'max_items'))
+        if isinstance(items, list) and validator.additional_items is False:
+            checks.append(('len(%s) > %d' % (value, len(items)), 'additional_items'))
+        for idx, (condition, code) in enumerate(checks):
+            with builder.block('%s %s:' % ('if' if idx == 0 else 'elif', condition)):
+                builder.line(error(builder, validator, code))
+
+        builder.line('%s = {}' % errors)
+        if validator.unique_items:
+            builder.line('%s = Uniqueness()' % seen_items)
+
+        pos = builder.name('pos')
+        item = builder.name('item')
+        with builder.block('for %s, %s in enumerate(%s):' % (pos, item, value)):
+            with builder.block('try:'):
+                if isinstance(items, list):
+                    emit_positional_items(builder, validator, pos, item, defs)
+                elif items is not None:
+                    emit(builder, items, item, item, defs)
+
+                if validator.unique_items:
+                    with builder.block('if %s in %s:' % (item, seen_items)):
+                        builder.line(error(builder, validator, 'unique_items'))
+                    builder.line('%s.add(%s)' % (seen_items, item))
+
+                builder.line('%s.append(%s)' % (validated, item))
+            with builder.block('except ValidationError as exc:'):
+                builder.line('%s[%s] = exc.detail' % (errors, pos))
+
+        with builder.block('if %s:' % errors):
+            builder.line('raise ValidationError(%s)' % errors)
+        builder.line('%s = %s' % (target, validated))
+
+
+def emit_positional_items(builder, validator, pos, item, defs):
+    additional_items = validator.additional_items
+    if not isinstance(additional_items, validators.Validator):
+        additional_items = None
+
+    if not validator.items:
+        if additional_items is not None:
+            emit(builder, additional_items, item, item, defs)
+        return
+
+    for idx, child_schema in enumerate(validator.items):
+        with builder.block('%s %s == %d:' % ('if' if idx == 0 else 'elif', pos, idx)):
+            emit(builder, child_schema, item, item, defs)
+    if additional_items is not None:
+        with builder.block('else:'):
+            emit(builder, additional_items, item, item, defs)
+
+
+def emit_union(builder, validator, value, target, defs):
+    emit_null(builder, validator, value, target)
+    with builder.block('else:'):
+        emit_union_items(builder, validator, validator.items, value, target, defs)
+
+
+def emit_union_items(builder, validator, items, value, target, defs):
+    """
+    Try each item in turn, falling through to the next one on failure.
+    """
+    if not items:
+        builder.line(error(builder, validator, 'union'))
+        return
+
+    item = builder.name('item')
+    with builder.block('try:'):
+        emit(builder, items[0], value, item, defs)
+        builder.line('%s = %s' % (target, item))
+    with builder.block('except ValidationError:'):
+        emit_union_items(builder, validator, items[1:], value, target, defs)
+
+
+EMITTERS = {
+    validators.String: emit_string,
+    validators.NumericType: emit_numeric,
+    validators.Boolean: emit_boolean,
+    validators.Object: emit_object,
+    validators.Array: emit_array,
+    validators.Any: emit_any,
+    validators.Union: emit_union,
+    validators.Ref: emit_ref,
+}
@@ -1,8 +1,8 @@
 import json
 import typing
-from urllib.parse import urlparse
+from urllib.parse import parse_qsl, urlparse
 
-from apistar import types
+from apistar import exceptions, jsonbackends, types
 
 Method = typing.NewType('Method', str)
 Scheme = typing.NewType('Scheme', str)
@@ -13,10 +13,14 @@ QueryString = typing.NewType('QueryString', str)
 QueryParam = typing.NewType('QueryParam', str)
 Header = typing.NewType('Header', str)
 Body = typing.NewType('Body', bytes)
+BodyFile = typing.NewType('BodyFile', typing.BinaryIO)
 PathParams = typing.NewType('PathParams', dict)
 PathParam = typing.NewType('PathParam', str)
 RequestData = typing.TypeVar('RequestData')
 
+# Request bodies larger than this, in bytes, are spooled to a temporary file.
+BODY_SPOOL_SIZE = 1024 * 1024
+
 
 class URL(str):
     """
@@ -39,23 +43,44 @@ StrMapping = typing.Mapping[str, str]
 class QueryParams(typing.Mapping[str, str]):
     """
     An immutable multidict.
+
+    May be instantiated with a raw query string, in which case it is only
+    parsed when first accessed.
     """
 
-    def __init__(self, value: typing.Union[StrMapping, StrPairs]=None) -> None:
+    def __init__(self, value: typing.Union[str, StrMapping, StrPairs]=None) -> None:
         if value is None:
             value = []
-        if hasattr(value, 'items'):
-            items = list(value.items())
+        if isinstance(value, str):
+            self._raw = value
+            self._items = None
+        elif hasattr(value, 'items'):
+            self._raw = None
+            self._items = list(value.items())
         else:
-            items = list(value)
-        self._dict = {k: v for k, v in reversed(items)}
-        self._list = items
+            self._raw = None
+            self._items = list(value)
+        self._index = None
+
+    @property
+    def _list(self):
+        if self._items is None:
+            self._items = parse_qsl(self._raw)
+        return self._items
+
+    @property
+    def _positions(self):
+        # Maps each key to the positions of its values in `_list`.
+        if self._index is None:
+            index = {}
+            for position, (key, value) in enumerate(self._list):
+                index.setdefault(key, []).append(position)
+            self._index = index
+        return self._index
 
     def get_list(self, key: str) -> typing.List[str]:
-        return [
-            item_value for item_key, item_value in self._list
-            if item_key == key
-        ]
+        items = self._list
+        return [items[position][1] for position in self._positions.get(key, [])]
 
     def keys(self):
         return [key for key, value in self._list]
@@ -67,16 +92,16 @@ class QueryParams(typing.Mapping[str, str]):
         return list(self._list)
 
     def get(self, key, default=None):
-        if key in self._dict:
-            return self._dict[key]
-        else:
+        positions = self._positions.get(key)
+        if positions is None:
             return default
+        return self._list[positions[0]][1]
 
     def __getitem__(self, key):
-        return self._dict[key]
+        return self._list[self._positions[key][0]][1]
 
     def __contains__(self, key):
-        return key in self._dict
+        return key in self._positions
 
     def __iter__(self):
         return iter(self._list)
@@ -168,6 +193,135 @@ class MutableHeaders(Headers):
             ]
 
 
+class LazyHeaders(Headers):
+    """
+    Base class for read-only headers that are looked up from the underlying
+    server's representation on demand. The full multidict is only built if
+    the headers are iterated over, or compared.
+    """
+
+    def __init__(self) -> None:
+        self._items = None
+
+    def load_items(self):
+        raise NotImplementedError()
+
+    @property
+    def _list(self):
+        if self._items is None:
+            self._items = self.load_items()
+        return self._items
+
+    @property
+    def _dict(self):
+        return {k: v for k, v in reversed(self._list)}
+
+    def __getitem__(self, key: str):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str):
+        return self.get(key) is not None
+
+
+class WSGIHeaders(LazyHeaders):
+    """
+    Headers that are looked up from a WSGI environ, so that eg. `content-type`
+    reads `CONTENT_TYPE`, and `x-foo` reads `HTTP_X_FOO`.
+    """
+
+    def __init__(self, environ: typing.Mapping[str, str]) -> None:
+        super().__init__()
+        self._environ = environ
+
+    def load_items(self):
+        items = []
+        for key, value in self._environ.items():
+            if key.startswith('HTTP_'):
+                items.append((key[5:].lower().replace('_', '-'), str(value)))
+            elif key in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                items.append((key.lower().replace('_', '-'), str(value)))
+        return items
+
+    def get_list(self, key: str) -> typing.List[str]:
+        value = self.get(key)
+        return [] if value is None else [value]
+
+    def get(self, key: str, default: str=None):
+        key = key.upper().replace('-', '_')
+        if key not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            key = 'HTTP_' + key
+        value = self._environ.get(key)
+        return default if value is None else str(value)
+
+
+class ASGIHeaders(LazyHeaders):
+    """
+    Headers that are looked up from the raw header pairs in an ASGI scope.
+    Only the values of the headers that are accessed are decoded.
+    """
+
+    def __init__(self, raw_headers: typing.Sequence[typing.Tuple[bytes, bytes]]) -> None:
+        super().__init__()
+        self._raw_headers = raw_headers
+
+    def load_items(self):
+        return [
+            (key.decode().lower(), value.decode())
+            for key, value in self._raw_headers
+        ]
+
+    def get_list(self, key: str) -> typing.List[str]:
+        key_bytes = key.lower().encode()
+        return [
+            value.decode() for raw_key, value in self._raw_headers
+            if raw_key.lower() == key_bytes
+        ]
+
+    def get(self, key: str, default: str=None):
+        key_bytes = key.lower().encode()
+        for raw_key, value in self._raw_headers:
+            if raw_key.lower() == key_bytes:
+                return value.decode()
+        return default
+
+
+class BodyStream():
+    """
+    The request body, as an iterator of bytestring chunks, which is read from
+    the connection as it is consumed. Use `for` to iterate over it with `App`,
+    or `async for` with `ASyncApp`. The stream may only be consumed once.
+    """
+    def __init__(self, max_size: int=None) -> None:
+        self.max_size = max_size
+        self.received = 0
+        # Once the body components have consumed the stream, they keep it as
+        # either bytes or a spooled file, so that the other may reuse it.
+        self.body = None  # type: bytes
+        self.body_file = None  # type: typing.BinaryIO
+
+    def check_content_length(self, content_length: str=None) -> None:
+        """
+        Reject requests that declare a body larger than `max_size`, before
+        reading any of it.
+        """
+        if self.max_size is None or not content_length:
+            return
+        try:
+            declared = int(content_length)
+        except ValueError:
+            return
+        if declared > self.max_size:
+            raise exceptions.RequestEntityTooLarge()
+
+    def check_chunk(self, chunk: bytes) -> None:
+        self.received += len(chunk)
+        if self.max_size is not None and self.received > self.max_size:
+            raise exceptions.RequestEntityTooLarge()
+
+
 class Request:
     def __init__(self,
                  method: Method,
@@ -218,6 +372,51 @@ class Response:
             self.headers['Content-Type'] = content_type
 
 
+class StreamingResponse(Response):
+    """
+    A response whose content is an iterator, or async iterator, of bytes or
+    strings. Each chunk is rendered and sent as it is produced, rather than
+    the whole of the content being rendered up front.
+    """
+    def __init__(self,
+                 content: typing.Union[typing.Iterable, typing.AsyncIterable],
+                 status_code: int=200,
+                 headers: typing.Union[StrMapping, StrPairs]=None,
+                 exc_info=None) -> None:
+        self.content = content
+        self.status_code = status_code
+        self.headers = MutableHeaders(headers)
+        self.set_default_headers()
+        self.exc_info = exc_info
+
+    @property
+    def is_async(self) -> bool:
+        return hasattr(self.content, '__aiter__')
+
+    def __iter__(self) -> typing.Iterator[bytes]:
+        if self.is_async:
+            raise RuntimeError('Async iterators may only be streamed by ASyncApp.')
+        for chunk in self.content:
+            yield self.render(chunk)
+        end = self.render_end()
+        if end:
+            yield end
+
+    def render_end(self) -> bytes:
+        """
+        Return any content to send after the last chunk.
+        """
+        return b''
+
+    def set_default_headers(self):
+        # The length isn't known until the content has been sent.
+        if 'Content-Type' not in self.headers and self.media_type is not None:
+            content_type = self.media_type
+            if self.charset is not None:
+                content_type += '; charset=%s' % self.charset
+            self.headers['Content-Type'] = content_type
+
+
 class HTMLResponse(Response):
     media_type = 'text/html'
     charset = 'utf-8'
@@ -233,13 +432,61 @@ class JSONResponse(Response):
         'separators': (',', ':'),
     }
 
+    # The name of a backend in `jsonbackends.BACKENDS`, or `None` for the default.
+    backend = None
+
     def render(self, content: typing.Any) -> bytes:
-        options = {'default': self.default}
-        options.update(self.options)
-        return json.dumps(content, **options).encode('utf-8')
+        if self.options is not JSONResponse.options:
+            # Customized options are only supported by the standard library.
+            options = {'default': self.default}
+            options.update(self.options)
+            return json.dumps(content, **options).encode('utf-8')
+        return jsonbackends.get_backend(self.backend).dumps(content, default=self.default)
 
     def default(self, obj: typing.Any) -> typing.Any:
         if isinstance(obj, types.Type):
-            return dict(obj)
+            return obj._serialize()
         error = "Object of type '%s' is not JSON serializable."
-        return TypeError(error % type(obj).__name__)
+        raise TypeError(error % type(obj).__name__)
+
+
+class NDJSONResponse(StreamingResponse):
+    """
+    Streams an iterator, or async iterator, of items as newline delimited
+    JSON, with each item encoded as it is sent.
+    """
+    media_type = 'application/x-ndjson'
+    charset = None
+    backend = None
+    default = JSONResponse.default
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.json = jsonbackends.get_backend(self.backend)
+
+    def render(self, item: typing.Any) -> bytes:
+        return self.json.dumps(item, default=self.default) + b'\n'
+
+
+class JSONArrayResponse(StreamingResponse):
+    """
+    Streams an iterator, or async iterator, of items as a JSON array, with
+    each item encoded as it is sent.
+    """
+    media_type = 'application/json'
+    charset = None
+    backend = None
+    default = JSONResponse.default
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.json = jsonbackends.get_backend(self.backend)
+        self.separator = b'['
+
+    def render(self, item: typing.Any) -> bytes:
+        content = self.separator + self.json.dumps(item, default=self.default)
+        self.separator = b','
+        return content
+
+    def render_end(self) -> bytes:
+        return b'[]' if self.separator == b'[' else b']'
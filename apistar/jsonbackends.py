@@ -0,0 +1,230 @@
+import collections
+import json
+import math
+import sys
+import typing
+
+from apistar import exceptions
+from apistar.compat import orjson, rapidjson, ujson
+
+# The error raised for NaN and infinite floats, which JSON can't represent.
+NON_FINITE_MESSAGE = 'Out of range float values are not JSON compliant'
+
+
+class JSONBackend():
+    name = None  # type: str
+
+    def dumps(self, data: typing.Any, default: typing.Callable=None, indent: bool=False,
+              allow_nan: bool=None) -> bytes:
+        """
+        Encode data as compact, UTF-8 encoded JSON. Non-ASCII characters are
+        included directly, rather than escaped. `default` is called for any
+        objects that the backend can't encode natively. Dictionary keys that
+        are not strings, such as the indexes in validation errors, are
+        encoded as strings. With `indent`, four spaces are used.
+
+        NaN and infinite floats raise `ValueError`, unless `allow_nan` is set,
+        in which case they are encoded as `null`. It defaults to the value
+        given to `set_backend()`.
+        """
+        if allow_nan is None:
+            allow_nan = _allow_nan
+        try:
+            return self.encode(data, default, indent, allow_nan)
+        except ValueError as exc:
+            if not allow_nan or NON_FINITE_MESSAGE not in str(exc):
+                raise
+        # Only re-encode once the backend has refused a non-finite float, so
+        # the common case doesn't pay for the extra pass.
+        return self.encode(replace_non_finite(data, default), default, indent, allow_nan)
+
+    def encode(self, data: typing.Any, default: typing.Callable, indent: bool, allow_nan: bool) -> bytes:
+        """
+        Encode data as described by `dumps()`, raising `ValueError` with
+        `NON_FINITE_MESSAGE` for NaN and infinite floats, unless `allow_nan` is
+        set and they are already encoded as `null`.
+        """
+        raise NotImplementedError()
+
+    def loads(self, content: typing.Union[bytes, str]) -> typing.Any:
+        raise NotImplementedError()
+
+
+def replace_non_finite(data: typing.Any, default: typing.Callable=None) -> typing.Any:
+    """
+    Return a copy of `data` with any NaN or infinite floats replaced by `None`.
+    """
+    if isinstance(data, float):
+        return data if math.isfinite(data) else None
+    if isinstance(data, (str, int, bool)) or data is None:
+        return data
+    if isinstance(data, dict):
+        return {key: replace_non_finite(value, default) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [replace_non_finite(item, default) for item in data]
+    if default is not None:
+        return replace_non_finite(default(data), default)
+    return data
+
+
+def contains_non_finite(data: typing.Any, default: typing.Callable=None) -> bool:
+    if isinstance(data, float):
+        return not math.isfinite(data)
+    if isinstance(data, (str, int, bool)) or data is None:
+        return False
+    if isinstance(data, dict):
+        return any(contains_non_finite(value, default) for value in data.values())
+    if isinstance(data, (list, tuple)):
+        return any(contains_non_finite(item, default) for item in data)
+    if default is not None:
+        return contains_non_finite(default(data), default)
+    return False
+
+
+class StandardLibraryBackend(JSONBackend):
+    name = 'json'
+
+    def encode(self, data, default, indent, allow_nan):
+        return json.dumps(
+            data,
+            default=default,
+            ensure_ascii=False,
+            allow_nan=False,
+            indent=4 if indent else None,
+            separators=(',', ': ') if indent else (',', ':')
+        ).encode('utf-8')
+
+    def loads(self, content, object_pairs_hook=None):
+        if isinstance(content, bytes):
+            content = content.decode('utf-8')
+        return json.loads(content, object_pairs_hook=object_pairs_hook)
+
+
+class ORJSONBackend(JSONBackend):
+    name = 'orjson'
+
+    def encode(self, data, default, indent, allow_nan):
+        if indent:
+            # orjson only indents with two spaces.
+            return stdlib.encode(data, default, indent, allow_nan)
+        content = orjson.dumps(data, default=default, option=orjson.OPT_NON_STR_KEYS)
+        # orjson always encodes non-finite floats as `null`, so any output that
+        # includes `null` needs checking.
+        if not allow_nan and b'null' in content and contains_non_finite(data, default):
+            raise ValueError(NON_FINITE_MESSAGE)
+        return content
+
+    def loads(self, content):
+        return orjson.loads(content)
+
+
+class UJSONBackend(JSONBackend):
+    name = 'ujson'
+
+    def __init__(self):
+        # Recent versions encode non-finite floats as `NaN` and `Infinity`
+        # unless `allow_nan=False` is given. Older ones always raise.
+        try:
+            ujson.dumps(0, allow_nan=False)
+        except TypeError:
+            self.options = {}
+        else:
+            self.options = {'allow_nan': False}
+
+    def encode(self, data, default, indent, allow_nan):
+        kwargs = {
+            'ensure_ascii': False,
+            'escape_forward_slashes': False,
+            'indent': 4 if indent else 0
+        }
+        kwargs.update(self.options)
+        if default is not None:
+            kwargs['default'] = default
+        try:
+            return ujson.dumps(data, **kwargs).encode('utf-8')
+        except OverflowError as exc:
+            if 'Invalid Nan' in str(exc) or 'Invalid Inf' in str(exc):
+                raise ValueError(NON_FINITE_MESSAGE) from None
+            raise
+
+    def loads(self, content):
+        return ujson.loads(content)
+
+
+class RapidJSONBackend(JSONBackend):
+    name = 'rapidjson'
+
+    def encode(self, data, default, indent, allow_nan):
+        return rapidjson.dumps(
+            data,
+            default=default,
+            ensure_ascii=False,
+            allow_nan=False,
+            mapping_mode=rapidjson.MM_COERCE_KEYS_TO_STRINGS,
+            indent=4 if indent else None
+        ).encode('utf-8')
+
+    def loads(self, content):
+        return rapidjson.loads(content)
+
+
+stdlib = StandardLibraryBackend()
+
+# The installed backends, in order of preference. The first is used by default.
+BACKENDS = collections.OrderedDict([
+    (backend.name, backend) for backend in (
+        ORJSONBackend() if orjson is not None else None,
+        UJSONBackend() if ujson is not None else None,
+        RapidJSONBackend() if rapidjson is not None else None,
+        stdlib
+    ) if backend is not None
+])
+
+# Decoding into `OrderedDict` instances is only needed before Python 3.7,
+# where the ordering of plain dictionaries isn't guaranteed.
+ORDERED = sys.version_info < (3, 7)
+
+_backend = next(iter(BACKENDS.values()))
+_ordered = ORDERED
+_allow_nan = False
+
+
+def register_backend(backend: JSONBackend) -> None:
+    BACKENDS[backend.name] = backend
+
+
+def get_backend(name: str=None) -> JSONBackend:
+    if name is None:
+        return _backend
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        msg = 'JSON backend "%s" is not installed. Available backends are: %s.'
+        raise exceptions.ConfigurationError(msg % (name, ', '.join(BACKENDS))) from None
+
+
+def set_backend(name: str=None, ordered: bool=None, allow_nan: bool=None) -> None:
+    """
+    Select the backend used by default, whether decoded objects should be
+    `OrderedDict` instances, and whether NaN and infinite floats are encoded
+    as `null` rather than raising `ValueError`. Decoding to ordered
+    dictionaries always uses the standard library.
+    """
+    global _backend, _ordered, _allow_nan
+    if name is not None:
+        _backend = get_backend(name)
+    if ordered is not None:
+        _ordered = ordered
+    if allow_nan is not None:
+        _allow_nan = allow_nan
+
+
+def dumps(data: typing.Any, default: typing.Callable=None, indent: bool=False,
+          allow_nan: bool=None) -> bytes:
+    return _backend.dumps(data, default=default, indent=indent, allow_nan=allow_nan)
+
+
+def loads(content: typing.Union[bytes, str], ordered: bool=None) -> typing.Any:
+    if _ordered if ordered is None else ordered:
+        return stdlib.loads(content, object_pairs_hook=collections.OrderedDict)
+    return _backend.loads(content)
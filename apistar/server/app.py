@@ -1,28 +1,47 @@
+import asyncio
+import inspect
+import logging
 import sys
+import time
 import typing
 
 import werkzeug
+from werkzeug.wsgi import ClosingIterator
 
 from apistar import exceptions
-from apistar.http import HTMLResponse, JSONResponse, PathParams, Response
+from apistar.http import (
+    HTMLResponse, JSONResponse, PathParams, Response, StreamingResponse
+)
+from apistar.server import asgi, wsgi
 from apistar.server.adapters import ASGItoWSGIAdapter
 from apistar.server.asgi import (
     ASGI_COMPONENTS, ASGIReceive, ASGIScope, ASGISend
 )
 from apistar.server.components import Component, ReturnValue
-from apistar.server.core import Route, generate_document
-from apistar.server.injector import ASyncInjector, Injector
+from apistar.server.core import Include, Route, generate_document
+from apistar.server.injector import (
+    ASyncInjector, Injector, StateMethod, ThreadedFunction
+)
 from apistar.server.router import Router
 from apistar.server.staticfiles import ASyncStaticFiles, StaticFiles
 from apistar.server.templates import Templates
+from apistar.server.threadpool import ThreadPool
 from apistar.server.validation import VALIDATION_COMPONENTS
 from apistar.server.wsgi import (
     RESPONSE_STATUS_TEXT, WSGI_COMPONENTS, WSGIEnviron, WSGIStartResponse
 )
 
+logger = logging.getLogger('apistar')
+
+
+def isgenerator(value):
+    # `inspect.isasyncgen` is only available from Python 3.6.
+    return inspect.isgenerator(value) or getattr(inspect, 'isasyncgen', lambda value: False)(value)
+
 
 class App():
     interface = 'wsgi'
+    injector_class = Injector
 
     def __init__(self,
                  routes,
@@ -33,7 +52,12 @@ class App():
                  docs_url='/docs/',
                  static_url='/static/',
                  components=None,
-                 event_hooks=None):
+                 event_hooks=None,
+                 eager=False,
+                 prerender_not_found=False,
+                 max_body_size=None,
+                 body_spool_size=None,
+                 route_cache=None):
 
         packages = tuple() if packages is None else tuple(packages)
 
@@ -51,17 +75,23 @@ class App():
             msg = 'event_hooks must be a list.'
             assert isinstance(event_hooks, (list, tuple)), msg
 
+        self.max_body_size = max_body_size
+        self.body_spool_size = body_spool_size
+        self.route_cache = route_cache
+
         routes = routes + self.include_extra_routes(schema_url, docs_url, static_url)
         self.init_document(routes)
         self.init_router(routes)
         self.init_templates(template_dir, packages)
         self.init_staticfiles(static_url, static_dir, packages)
         self.init_injector(components)
+        self.init_event_hooks(event_hooks)
+        self.init_error_pipelines()
+        self.init_not_found(prerender_not_found)
+        self.prepare_routes(routes)
         self.debug = False
-        self.event_hooks = event_hooks
-
-        # Ensure event hooks can all be instantiated.
-        self.get_event_hooks()
+        if eager:
+            self.warmup()
 
     def include_extra_routes(self, schema_url=None, docs_url=None, static_url=None):
         extra_routes = []
@@ -90,7 +120,7 @@ class App():
         self.document = generate_document(routes)
 
     def init_router(self, routes):
-        self.router = Router(routes)
+        self.router = Router(routes, cache=self.route_cache)
 
     def init_templates(self, template_dir: str=None, packages: typing.Sequence[str]=None):
         if not template_dir and not packages:
@@ -110,7 +140,7 @@ class App():
 
     def init_injector(self, components=None):
         components = components if components else []
-        components = list(WSGI_COMPONENTS + VALIDATION_COMPONENTS) + components
+        components = self.get_body_components(wsgi) + list(WSGI_COMPONENTS + VALIDATION_COMPONENTS) + components
         initial_components = {
             'environ': WSGIEnviron,
             'start_response': WSGIStartResponse,
@@ -120,9 +150,68 @@ class App():
             'route': Route,
             'response': Response
         }
-        self.injector = Injector(components, initial_components)
+        self.injector = self.injector_class(components, initial_components)
+
+    def get_body_components(self, interface):
+        """
+        Return components configured with the request body settings, which
+        take precedence over the default body components for the interface.
+        """
+        body_components = []
+        if self.max_body_size is not None:
+            body_components.append(interface.BodyStreamComponent(self.max_body_size))
+        if self.body_spool_size is not None:
+            body_components.append(interface.SpooledFileComponent(self.body_spool_size))
+        return body_components
+
+    def prepare_routes(self, routes):
+        for item in routes:
+            if isinstance(item, Include):
+                self.prepare_routes(item.routes)
+            else:
+                for component in self.injector.components:
+                    component.prepare(item)
+
+    def init_event_hooks(self, event_hooks=None):
+        self.event_hooks = event_hooks
+        self.event_hook_classes = []
+        self.on_request = []
+        self.on_response = []
+        self.on_error = []
+
+        for idx, hook in enumerate(event_hooks or []):
+            if isinstance(hook, type):
+                # New style usage, instantiate hooks on requests.
+                # The instance is placed in the request state, and the
+                # hook methods are called against it.
+                instance_key = 'event_hook:%d' % idx
+                self.event_hook_classes.append((instance_key, hook))
+
+                # Ensure event hooks can all be instantiated.
+                hook()
+            else:
+                # Old style usage, to be deprecated on the next version bump.
+                instance_key = None
+
+            for name in ('on_request', 'on_response', 'on_error'):
+                if not hasattr(hook, name):
+                    continue
+                method = getattr(hook, name)
+                # Only plain functions are called against the hook instance.
+                # Static and class methods are used as they are.
+                if instance_key is not None and inspect.isfunction(inspect.getattr_static(hook, name)):
+                    method = StateMethod(method, instance_key)
+                getattr(self, name).append(method)
+
+        self.on_response.reverse()
+        self.on_error.reverse()
 
     def get_event_hooks(self):
+        """
+        Return the on_request, on_response, and on_error hooks, with any hook
+        classes instantiated. Requests no longer use this, since the hooks are
+        resolved once and the instances are created in the request state.
+        """
         event_hooks = []
         for hook in self.event_hooks or []:
             if isinstance(hook, type):
@@ -149,6 +238,85 @@ class App():
 
         return on_request, on_response, on_error
 
+    def init_error_pipelines(self):
+        """
+        Resolve the pipelines used when handling errors. These do not depend
+        on the matched route, so are shared by every route.
+        """
+        finalize = self.get_finalize()
+        self.exception_plan = self.injector.resolve_plan(
+            [self.exception_handler] + self.on_response + [finalize]
+        )
+        self.on_error_plan = self.injector.resolve_plan(self.on_error)
+        self.error_plan = self.injector.resolve_plan(
+            [self.error_handler, finalize]
+        )
+
+    def init_not_found(self, prerender_not_found=False):
+        """
+        Pre-render the responses for requests that don't match any route, so
+        that they can be returned without running the error pipeline.
+
+        Event hooks that need to see these requests can set
+        `handle_not_found = True`, in which case the full pipeline is used.
+        """
+        self.not_found_responses = None
+        if not prerender_not_found:
+            return
+        if any(getattr(hook, 'handle_not_found', False) for hook in self.event_hooks or []):
+            return
+
+        self.not_found_responses = {
+            exc_class: self.prerender_response(self.render_not_found(exc_class()))
+            for exc_class in (exceptions.NotFound, exceptions.MethodNotAllowed)
+        }
+
+    def render_not_found(self, exc: exceptions.HTTPException) -> Response:
+        return JSONResponse(exc.detail, exc.status_code, exc.get_headers())
+
+    def prerender_response(self, response: Response):
+        return (RESPONSE_STATUS_TEXT[response.status_code], list(response.headers), response.content)
+
+    def resolve_route(self, route):
+        """
+        Return the plan used to handle a request for the given route.
+        This is resolved once per route, and stored against it.
+        """
+        if route.standalone:
+            funcs = [route.handler]
+        else:
+            funcs = (
+                self.on_request +
+                [self.get_handler(route), self.render_response] +
+                self.on_response +
+                [self.get_finalize()]
+            )
+        return self.injector.resolve_plan(funcs)
+
+    def warmup(self):
+        """
+        Resolve the plan for every route up front, rather than on the first
+        request to each route. Returns a dictionary mapping the (method, url)
+        of each route to the time taken to resolve it, in seconds.
+        """
+        resolution_times = {}
+        for url, name, route in self.router.routes:
+            start = time.perf_counter()
+            try:
+                route.get_artifact(self, self.resolve_route)
+            except exceptions.ConfigurationError as exc:
+                msg = 'Could not resolve route "%s" (%s %s). %s'
+                raise exceptions.ConfigurationError(msg % (name, route.method, url, exc)) from exc
+            resolution_times[(route.method, url)] = time.perf_counter() - start
+        self.resolution_times = resolution_times
+        return resolution_times
+
+    def get_handler(self, route):
+        return route.handler
+
+    def get_finalize(self):
+        return self.finalize_wsgi
+
     def static_url(self, filename):
         return self.router.reverse_url('static', filename=filename)
 
@@ -169,6 +337,8 @@ class App():
     def render_response(self, return_value: ReturnValue) -> Response:
         if isinstance(return_value, Response):
             return return_value
+        elif isgenerator(return_value):
+            return StreamingResponse(return_value)
         elif isinstance(return_value, str):
             return HTMLResponse(return_value)
         return JSONResponse(return_value)
@@ -186,14 +356,36 @@ class App():
             exc_info = response.exc_info
             raise exc_info[0].with_traceback(exc_info[1], exc_info[2])
 
+        # Checked before any headers are sent, so that an error response
+        # may still be returned instead.
+        if isinstance(response, StreamingResponse) and response.is_async:
+            msg = 'Async iterators may only be streamed by ASyncApp.'
+            raise exceptions.ConfigurationError(msg)
+
         start_response(
             RESPONSE_STATUS_TEXT[response.status_code],
             list(response.headers),
             response.exc_info
         )
+        if isinstance(response, StreamingResponse):
+            return iter(response)
         return [response.content]
 
     def __call__(self, environ, start_response):
+        method = environ['REQUEST_METHOD'].upper()
+        path = environ['PATH_INFO']
+
+        match = None
+        if self.not_found_responses is not None:
+            try:
+                match = self.router.lookup(path, method)
+            except (exceptions.NotFound, exceptions.MethodNotAllowed) as exc:
+                status, headers, content = self.not_found_responses[type(exc)]
+                start_response(status, list(headers))
+                return [content]
+            except exceptions.HTTPException:
+                pass
+
         state = {
             'environ': environ,
             'start_response': start_response,
@@ -202,49 +394,61 @@ class App():
             'path_params': None,
             'route': None,
             'response': None,
+            'teardown': [],
         }
-        method = environ['REQUEST_METHOD'].upper()
-        path = environ['PATH_INFO']
+        for instance_key, hook in self.event_hook_classes:
+            state[instance_key] = hook()
 
-        if self.event_hooks is None:
-            on_request, on_response, on_error = [], [], []
-        else:
-            on_request, on_response, on_error = self.get_event_hooks()
+        streaming = False
+        try:
+            content = self.handle_request(path, method, state, match)
+            if not isinstance(content, list):
+                # Streamed content is only complete once the server has
+                # consumed it, so teardown is deferred until it is closed.
+                streaming = True
+                return ClosingIterator(content, lambda: self.teardown(state))
+            return content
+        finally:
+            if not streaming:
+                self.teardown(state)
+
+    def teardown(self, state):
+        """
+        Run the remainder of any generator components. By now a response has
+        been built, so errors are logged rather than allowed to replace it.
+        """
+        try:
+            self.injector.teardown(state)
+        except Exception:
+            logger.exception('Error tearing down request.')
 
+    def handle_request(self, path, method, state, match=None):
         try:
-            route, path_params = self.router.lookup(path, method)
+            route, path_params = match or self.router.lookup(path, method)
             state['route'] = route
             state['path_params'] = path_params
-            if route.standalone:
-                funcs = [route.handler]
-            else:
-                funcs = (
-                    on_request +
-                    [route.handler, self.render_response] +
-                    on_response +
-                    [self.finalize_wsgi]
-                )
-            return self.injector.run(funcs, state)
+            plan = route.get_artifact(self, self.resolve_route)
+            return self.injector.run_plan(plan, state)
         except Exception as exc:
             try:
                 state['exc'] = exc
-                funcs = (
-                    [self.exception_handler] +
-                    on_response +
-                    [self.finalize_wsgi]
-                )
-                return self.injector.run(funcs, state)
+                return self.injector.run_plan(self.exception_plan, state)
             except Exception as inner_exc:
                 try:
                     state['exc'] = inner_exc
-                    self.injector.run(on_error, state)
+                    self.injector.run_plan(self.on_error_plan, state)
                 finally:
-                    funcs = [self.error_handler, self.finalize_wsgi]
-                    return self.injector.run(funcs, state)
+                    return self.injector.run_plan(self.error_plan, state)
 
 
 class ASyncApp(App):
     interface = 'asgi'
+    injector_class = ASyncInjector
+
+    def __init__(self, *args, run_in_thread=False, max_threads=None, **kwargs):
+        self.run_in_thread = run_in_thread
+        self.thread_pool = ThreadPool(max_workers=max_threads)
+        super().__init__(*args, **kwargs)
 
     def include_extra_routes(self, schema_url=None, docs_url=None, static_url=None):
         extra_routes = []
@@ -271,7 +475,8 @@ class ASyncApp(App):
 
     def init_injector(self, components=None):
         components = components if components else []
-        components = list(ASGI_COMPONENTS + VALIDATION_COMPONENTS) + components
+        builtin_components = self.get_body_components(asgi) + list(ASGI_COMPONENTS + VALIDATION_COMPONENTS)
+        components = builtin_components + components
         initial_components = {
             'scope': ASGIScope,
             'receive': ASGIReceive,
@@ -282,7 +487,12 @@ class ASyncApp(App):
             'route': Route,
             'response': Response,
         }
-        self.injector = ASyncInjector(components, initial_components)
+        self.injector = self.injector_class(
+            components, initial_components,
+            thread_pool=self.thread_pool,
+            run_in_thread=self.run_in_thread,
+            builtin_components=builtin_components
+        )
 
     def init_staticfiles(self, static_url: str, static_dir: str=None, packages: typing.Sequence[str]=None):
         if not static_dir and not packages:
@@ -290,7 +500,47 @@ class ASyncApp(App):
         else:
             self.statics = ASyncStaticFiles(static_url, static_dir, packages)
 
+    def get_handler(self, route):
+        run_in_thread = self.run_in_thread if route.run_in_thread is None else route.run_in_thread
+        if run_in_thread and not asyncio.iscoroutinefunction(route.handler):
+            return ThreadedFunction(route.handler, self.thread_pool)
+        return route.handler
+
+    def get_finalize(self):
+        return self.finalize_asgi
+
+    def prerender_response(self, response: Response):
+        start = {
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': [
+                [key.encode(), value.encode()]
+                for key, value in response.headers
+            ]
+        }
+        body = {
+            'type': 'http.response.body',
+            'body': response.content
+        }
+
+        async def asgi_callable(receive, send):
+            await send(dict(start))
+            await send(dict(body))
+        return asgi_callable
+
     def __call__(self, scope):
+        method = scope['method']
+        path = scope['path']
+
+        match = None
+        if self.not_found_responses is not None:
+            try:
+                match = self.router.lookup(path, method)
+            except (exceptions.NotFound, exceptions.MethodNotAllowed) as exc:
+                return self.not_found_responses[type(exc)]
+            except exceptions.HTTPException:
+                pass
+
         async def asgi_callable(receive, send):
             state = {
                 'scope': scope,
@@ -299,47 +549,41 @@ class ASyncApp(App):
                 'exc': None,
                 'app': self,
                 'path_params': None,
-                'route': None
+                'route': None,
+                'teardown': [],
             }
-            method = scope['method']
-            path = scope['path']
+            for instance_key, hook in self.event_hook_classes:
+                state[instance_key] = hook()
 
-            if self.event_hooks is None:
-                on_request, on_response, on_error = [], [], []
-            else:
-                on_request, on_response, on_error = self.get_event_hooks()
+            try:
+                await self.handle_request_async(path, method, state, match)
+            finally:
+                await self.teardown_async(state)
+        return asgi_callable
 
+    async def teardown_async(self, state):
+        try:
+            await self.injector.teardown_async(state)
+        except Exception:
+            logger.exception('Error tearing down request.')
+
+    async def handle_request_async(self, path, method, state, match=None):
+        try:
+            route, path_params = match or self.router.lookup(path, method)
+            state['route'] = route
+            state['path_params'] = path_params
+            plan = route.get_artifact(self, self.resolve_route)
+            await self.injector.run_plan_async(plan, state)
+        except Exception as exc:
             try:
-                route, path_params = self.router.lookup(path, method)
-                state['route'] = route
-                state['path_params'] = path_params
-                if route.standalone:
-                    funcs = [route.handler]
-                else:
-                    funcs = (
-                        on_request +
-                        [route.handler, self.render_response] +
-                        on_response +
-                        [self.finalize_asgi]
-                    )
-                await self.injector.run_async(funcs, state)
-            except Exception as exc:
+                state['exc'] = exc
+                await self.injector.run_plan_async(self.exception_plan, state)
+            except Exception as inner_exc:
                 try:
-                    state['exc'] = exc
-                    funcs = (
-                        [self.exception_handler] +
-                        on_response +
-                        [self.finalize_asgi]
-                    )
-                    await self.injector.run_async(funcs, state)
-                except Exception as inner_exc:
-                    try:
-                        state['exc'] = inner_exc
-                        await self.injector.run_async(on_error, state)
-                    finally:
-                        funcs = [self.error_handler, self.finalize_asgi]
-                        await self.injector.run_async(funcs, state)
-        return asgi_callable
+                    state['exc'] = inner_exc
+                    await self.injector.run_plan_async(self.on_error_plan, state)
+                finally:
+                    await self.injector.run_plan_async(self.error_plan, state)
 
     async def finalize_asgi(self, response: Response, send: ASGISend, scope: ASGIScope):
         if response.exc_info is not None:
@@ -355,9 +599,30 @@ class ASyncApp(App):
                 for key, value in response.headers
             ]
         })
+        if not isinstance(response, StreamingResponse):
+            await send({
+                'type': 'http.response.body',
+                'body': response.content
+            })
+            return
+
+        if response.is_async:
+            async for chunk in response.content:
+                await send({
+                    'type': 'http.response.body',
+                    'body': response.render(chunk),
+                    'more_body': True
+                })
+        else:
+            for chunk in response.content:
+                await send({
+                    'type': 'http.response.body',
+                    'body': response.render(chunk),
+                    'more_body': True
+                })
         await send({
             'type': 'http.response.body',
-            'body': response.content
+            'body': response.render_end()
         })
 
     def serve(self, host, port, debug=False, **options):
@@ -1,6 +1,6 @@
+import tempfile
 import typing
 from inspect import Parameter
-from urllib.parse import parse_qsl
 
 from apistar import http
 from apistar.server.components import Component
@@ -8,6 +8,7 @@ from apistar.server.components import Component
 ASGIScope = typing.NewType('ASGIScope', dict)
 ASGIReceive = typing.NewType('ASGIReceive', typing.Callable)
 ASGISend = typing.NewType('ASGISend', typing.Callable)
+SpooledFile = typing.NewType('SpooledFile', typing.BinaryIO)
 
 
 class MethodComponent(Component):
@@ -68,8 +69,7 @@ class QueryStringComponent(Component):
 class QueryParamsComponent(Component):
     def resolve(self,
                 scope: ASGIScope) -> http.QueryParams:
-        query_string = scope['query_string'].decode()
-        return http.QueryParams(parse_qsl(query_string))
+        return http.QueryParams(scope['query_string'].decode())
 
 
 class QueryParamComponent(Component):
@@ -85,10 +85,7 @@ class QueryParamComponent(Component):
 class HeadersComponent(Component):
     def resolve(self,
                 scope: ASGIScope) -> http.Headers:
-        return http.Headers([
-            (key.decode(), value.decode())
-            for key, value in scope['headers']
-        ])
+        return http.ASGIHeaders(scope['headers'])
 
 
 class HeaderComponent(Component):
@@ -101,20 +98,85 @@ class HeaderComponent(Component):
         return http.Header(headers[name])
 
 
-class BodyComponent(Component):
-    async def resolve(self,
-                      receive: ASGIReceive) -> http.Body:
-        body = b''
-        while True:
-            message = await receive()
+class ASGIBodyStream(http.BodyStream):
+    def __init__(self, receive: ASGIReceive, max_size: int=None) -> None:
+        super().__init__(max_size)
+        self.receive = receive
+        self.more_body = True
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> bytes:
+        while self.more_body:
+            message = await self.receive()
             if not message['type'] == 'http.request':
                 error = "'Unexpected ASGI message type '%s'."
                 raise Exception(error % message['type'])
-            body += message.get('body', b'')
-            if not message.get('more_body', False):
-                break
+            self.more_body = message.get('more_body', False)
+            chunk = message.get('body', b'')
+            if chunk:
+                self.check_chunk(chunk)
+                return chunk
+        raise StopAsyncIteration()
 
-        return http.Body(body)
+
+class BodyStreamComponent(Component):
+    def __init__(self, max_body_size: int=None) -> None:
+        self.max_body_size = max_body_size
+
+    def resolve(self,
+                receive: ASGIReceive,
+                headers: http.Headers) -> http.BodyStream:
+        stream = ASGIBodyStream(receive, self.max_body_size)
+        stream.check_content_length(headers.get('Content-Length'))
+        return stream
+
+
+class SpooledFileComponent(Component):
+    def __init__(self, spool_size: int=http.BODY_SPOOL_SIZE) -> None:
+        self.spool_size = spool_size
+
+    def resolve(self) -> SpooledFile:
+        # Bodies are held in memory, unless they are larger than `spool_size`,
+        # in which case they are written to a temporary file on disk. The file
+        # is closed once the response has been sent. This is kept apart from
+        # `BodyFileComponent`, since async generators need Python 3.6.
+        body_file = tempfile.SpooledTemporaryFile(max_size=self.spool_size)
+        try:
+            yield SpooledFile(body_file)
+        finally:
+            body_file.close()
+
+
+class BodyFileComponent(Component):
+    async def resolve(self,
+                      stream: http.BodyStream,
+                      body_file: SpooledFile) -> http.BodyFile:
+        if stream.body is not None:
+            body_file.write(stream.body)
+        else:
+            async for chunk in stream:
+                body_file.write(chunk)
+        body_file.seek(0)
+        stream.body_file = body_file
+        return http.BodyFile(body_file)
+
+
+class BodyComponent(Component):
+    async def resolve(self,
+                      stream: http.BodyStream) -> http.Body:
+        # The body is only spooled if something asks for `BodyFile`.
+        if stream.body is None:
+            if stream.body_file is not None:
+                stream.body_file.seek(0)
+                stream.body = stream.body_file.read()
+            else:
+                chunks = []
+                async for chunk in stream:
+                    chunks.append(chunk)
+                stream.body = b''.join(chunks)
+        return http.Body(stream.body)
 
 
 class RequestComponent(Component):
@@ -138,6 +200,9 @@ ASGI_COMPONENTS = (
     QueryParamComponent(),
     HeadersComponent(),
     HeaderComponent(),
+    BodyStreamComponent(),
+    SpooledFileComponent(),
+    BodyFileComponent(),
     BodyComponent(),
     RequestComponent()
 )
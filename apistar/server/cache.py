@@ -0,0 +1,106 @@
+import collections
+
+
+class LRUCache():
+    """
+    A mapping that holds at most `maxsize` items, evicting the least
+    recently used item when it is full.
+    """
+    def __init__(self, maxsize: int=10000):
+        self.maxsize = maxsize
+        self.limit = maxsize
+        self.items = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __getitem__(self, key):
+        try:
+            value = self.items[key]
+        except KeyError:
+            self.misses += 1
+            raise
+        self.items.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def __setitem__(self, key, value):
+        if self.maxsize <= 0:
+            return
+        self.items[key] = value
+        self.items.move_to_end(key)
+        if len(self.items) > self.limit:
+            self.items.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, key):
+        return key in self.items
+
+    def clear(self):
+        self.items.clear()
+
+    def stats(self):
+        return {
+            'maxsize': self.maxsize,
+            'size': len(self),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+class SegmentedLRUCache(LRUCache):
+    """
+    An LRU cache that is split into a probationary segment, that new items
+    are added to, and a protected segment, that items are promoted to when
+    they are used again.
+
+    Items that are only ever used once are evicted from the probationary
+    segment, and so can't push frequently used items out of the cache.
+    """
+    def __init__(self, maxsize: int=10000, protected_ratio: float=0.8):
+        super().__init__(maxsize)
+        self.protected_size = max(min(int(maxsize * protected_ratio), maxsize - 1), 0)
+        self.limit = maxsize - self.protected_size
+        self.protected = collections.OrderedDict()
+
+    def __getitem__(self, key):
+        try:
+            value = self.protected[key]
+        except KeyError:
+            pass
+        else:
+            self.protected.move_to_end(key)
+            self.hits += 1
+            return value
+
+        value = super().__getitem__(key)
+        if self.protected_size > 0:
+            # Promote the item, moving the least recently used protected
+            # item back to the probationary segment if needed.
+            del self.items[key]
+            self.protected[key] = value
+            if len(self.protected) > self.protected_size:
+                demoted_key, demoted_value = self.protected.popitem(last=False)
+                super().__setitem__(demoted_key, demoted_value)
+        return value
+
+    def __setitem__(self, key, value):
+        if key in self.protected:
+            self.protected[key] = value
+            self.protected.move_to_end(key)
+            return
+        super().__setitem__(key, value)
+
+    def __len__(self):
+        return len(self.items) + len(self.protected)
+
+    def __contains__(self, key):
+        return key in self.items or key in self.protected
+
+    def clear(self):
+        self.items.clear()
+        self.protected.clear()
@@ -5,6 +5,15 @@ from apistar import exceptions
 
 
 class Component():
+    # Components with an 'app' scope are resolved once, and the value is then
+    # reused for every request. Components with a 'request' scope are
+    # resolved each time a request requires them.
+    scope = 'request'
+
+    # With `ASyncApp`, synchronous components may be run in a thread pool,
+    # rather than on the event loop. `None` uses the application's default.
+    run_in_thread = None
+
     def identity(self, parameter: inspect.Parameter):
         """
         Each component needs a unique identifier string that we use for lookups
@@ -42,6 +51,15 @@ class Component():
             raise exceptions.ConfigurationError(msg % self.__class__.__name__)
         return parameter.annotation is return_annotation
 
+    def prepare(self, route):
+        """
+        Called once for each route when the application is created.
+
+        Components may override this in order to precompute any per-route
+        artifacts up front, using `route.get_artifact()`.
+        """
+        pass
+
     def resolve(self):
         raise NotImplementedError()
 
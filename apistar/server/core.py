@@ -7,14 +7,31 @@ from apistar.document import Document, Field, Link, Response, Section
 
 
 class Route():
-    def __init__(self, url, method, handler, name=None, documented=True, standalone=False):
+    def __init__(self, url, method, handler, name=None, documented=True, standalone=False, run_in_thread=None):
         self.url = url
         self.method = method
         self.handler = handler
         self.name = name or handler.__name__
         self.documented = documented
         self.standalone = standalone
+        self.run_in_thread = run_in_thread
         self.link = self.generate_link(url, method, handler, self.name)
+        self.artifacts = {}
+
+    def get_artifact(self, key, build):
+        """
+        Return a value that has been precomputed for this route.
+
+        The value is created by calling `build(route)` the first time that
+        `key` is requested, and reused from then on. Components may use this
+        to avoid repeating any per-route work on every request.
+        """
+        try:
+            return self.artifacts[key]
+        except KeyError:
+            value = build(self)
+            self.artifacts[key] = value
+            return value
 
     def generate_link(self, url, method, handler, name):
         fields = self.generate_fields(url, method, handler)
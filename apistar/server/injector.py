@@ -1,10 +1,127 @@
 import asyncio
 import inspect
+import re
 
+from apistar.codegen import CodeBuilder
 from apistar.exceptions import ConfigurationError
 from apistar.server.components import ReturnValue
 
 
+class StateMethod():
+    """
+    A method that is called against an instance looked up from the injector
+    state when it runs, rather than against an instance bound in advance.
+
+    This allows us to resolve the dependencies of a method once, even though
+    the instance it is called on may change with every request.
+    """
+    def __init__(self, func, instance_key):
+        self.func = func
+        self.instance_key = instance_key
+        self.__name__ = func.__name__
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, StateMethod) and
+            self.func is other.func and
+            self.instance_key == other.instance_key
+        )
+
+    def __hash__(self):
+        return hash((self.func, self.instance_key))
+
+
+class ThreadedFunction():
+    """
+    Wraps a synchronous function so that it runs in a thread pool, and may
+    be awaited like a coroutine function.
+    """
+    def __init__(self, func, thread_pool):
+        self.func = func
+        self.thread_pool = thread_pool
+        self.__name__ = func.__name__
+        self.__qualname__ = getattr(func, '__qualname__', func.__name__)
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, ThreadedFunction) and
+            self.func == other.func and
+            self.thread_pool is other.thread_pool
+        )
+
+    def __hash__(self):
+        return hash(self.func)
+
+    async def __call__(self, **kwargs):
+        return await self.thread_pool.run(self.func, kwargs)
+
+
+class GeneratorComponent():
+    """
+    Wraps a component `resolve` method that is a generator. The yielded value
+    is returned, and the generator is added to the request's teardown list,
+    so that the code following the `yield` runs once the response is sent.
+    """
+    def __init__(self, func):
+        self.func = func
+        self.__name__ = func.__name__
+        self.__qualname__ = func.__qualname__
+
+    def __eq__(self, other):
+        return isinstance(other, GeneratorComponent) and self.func == other.func
+
+    def __hash__(self):
+        return hash(self.func)
+
+    def __call__(self, _teardown, **kwargs):
+        generator = self.func(**kwargs)
+        try:
+            value = next(generator)
+        except StopIteration:
+            msg = 'Component "%s" did not yield a value.'
+            raise ConfigurationError(msg % self.__qualname__) from None
+        _teardown.append(generator)
+        return value
+
+
+class AsyncGeneratorComponent(GeneratorComponent):
+    async def __call__(self, _teardown, **kwargs):
+        generator = self.func(**kwargs)
+        try:
+            value = await generator.__anext__()
+        except StopAsyncIteration:
+            msg = 'Component "%s" did not yield a value.'
+            raise ConfigurationError(msg % self.__qualname__) from None
+        _teardown.append(generator)
+        return value
+
+
+def isasyncgenfunction(func):
+    # `inspect.isasyncgenfunction` is only available from Python 3.6.
+    return getattr(inspect, 'isasyncgenfunction', lambda func: False)(func)
+
+
+def finish_generator(generator):
+    """
+    Run the remainder of a generator component, which should then stop.
+    """
+    try:
+        next(generator)
+    except StopIteration:
+        return
+    generator.close()
+    raise RuntimeError('Component generator did not stop.')
+
+
+async def finish_async_generator(generator):
+    try:
+        await generator.__anext__()
+    except StopAsyncIteration:
+        return
+    await generator.aclose()
+    raise RuntimeError('Component generator did not stop.')
+
+
 class BaseInjector():
     def run(self, func, state):
         raise NotImplementedError()
@@ -12,6 +129,9 @@ class BaseInjector():
 
 class Injector(BaseInjector):
     allow_async = False
+    thread_pool = None
+    run_in_thread = False
+    builtin_components = frozenset()
 
     def __init__(self, components, initial):
         self.components = components
@@ -20,8 +140,10 @@ class Injector(BaseInjector):
             val: key for key, val in initial.items()
         }
         self.resolver_cache = {}
+        self.app_values = {}
 
-    def resolve_function(self, func, output_name=None, seen_state=None, parent_parameter=None, set_return=False):
+    def resolve_function(self, func, output_name=None, seen_state=None, parent_parameter=None, set_return=False,
+                         run_in_thread=False):
         if seen_state is None:
             seen_state = set(self.initial)
 
@@ -29,7 +151,16 @@ class Injector(BaseInjector):
         kwargs = {}
         consts = {}
 
-        signature = inspect.signature(func)
+        if isinstance(func, StateMethod):
+            signature = inspect.signature(func.func)
+            instance_parameter, *parameters = signature.parameters.values()
+            signature = signature.replace(parameters=parameters)
+            kwargs[instance_parameter.name] = func.instance_key
+            func = func.func
+        elif isinstance(func, ThreadedFunction):
+            signature = inspect.signature(func.func)
+        else:
+            signature = inspect.signature(func)
 
         if output_name is None:
             if signature.return_annotation in self.reverse_initial:
@@ -59,21 +190,42 @@ class Injector(BaseInjector):
             for component in self.components:
                 if component.can_handle_parameter(parameter):
                     identity = component.identity(parameter)
+                    if component.scope == 'app':
+                        consts[parameter.name] = self.resolve_app_value(component, identity, parameter)
+                        break
                     kwargs[parameter.name] = identity
                     if identity not in seen_state:
                         seen_state.add(identity)
+                        component_in_thread = component.run_in_thread
+                        if component_in_thread is None and component in self.builtin_components:
+                            component_in_thread = False
                         steps += self.resolve_function(
                             func=component.resolve,
                             output_name=identity,
                             seen_state=seen_state,
-                            parent_parameter=parameter
+                            parent_parameter=parameter,
+                            run_in_thread=component_in_thread
                         )
                     break
             else:
                 msg = 'No component able to handle parameter "%s" on function "%s".'
                 raise ConfigurationError(msg % (parameter.name, func.__name__))
 
-        is_async = asyncio.iscoroutinefunction(func)
+        is_async = isinstance(func, ThreadedFunction) or asyncio.iscoroutinefunction(func)
+        if not set_return and inspect.isgeneratorfunction(func):
+            func = GeneratorComponent(func)
+            kwargs['_teardown'] = 'teardown'
+        elif not set_return and isasyncgenfunction(func):
+            func = AsyncGeneratorComponent(func)
+            kwargs['_teardown'] = 'teardown'
+            is_async = True
+
+        if run_in_thread is None:
+            run_in_thread = self.run_in_thread
+        if run_in_thread and not is_async and self.thread_pool is not None and not isinstance(func, GeneratorComponent):
+            func = ThreadedFunction(func, self.thread_pool)
+            is_async = True
+
         if is_async and not self.allow_async:
             msg = 'Function "%s" may not be async.'
             raise ConfigurationError(msg % (func.__name__, ))
@@ -82,6 +234,38 @@ class Injector(BaseInjector):
         steps.append(step)
         return steps
 
+    def resolve_app_value(self, component, identity, parameter):
+        """
+        Return the value for an app scoped component, resolving it the first
+        time that it is required.
+        """
+        try:
+            return self.app_values[identity]
+        except KeyError:
+            pass
+
+        if inspect.isgeneratorfunction(component.resolve) or isasyncgenfunction(component.resolve):
+            msg = 'App scoped component "%s" may not be a generator.'
+            raise ConfigurationError(msg % component.__class__.__name__)
+
+        steps = self.resolve_function(
+            func=component.resolve,
+            output_name=identity,
+            seen_state=set(),
+            parent_parameter=parameter
+        )
+        func, is_async, kwargs, consts, output_name, set_return = steps[-1]
+        if len(steps) > 1 or kwargs:
+            msg = 'App scoped component "%s" may only depend on other app scoped components.'
+            raise ConfigurationError(msg % component.__class__.__name__)
+        if is_async:
+            msg = 'App scoped component "%s" may not be async.'
+            raise ConfigurationError(msg % component.__class__.__name__)
+
+        value = func(**consts)
+        self.app_values[identity] = value
+        return value
+
     def resolve_functions(self, funcs):
         steps = []
         seen_state = set(self.initial)
@@ -90,15 +274,39 @@ class Injector(BaseInjector):
             steps.extend(func_steps)
         return steps
 
+    def resolve_stages(self, funcs):
+        """
+        Resolve a list of functions into a list of stages, where each stage
+        is a list of steps that do not depend on each other.
+        """
+        return [[step] for step in self.resolve_functions(funcs)]
+
+    def resolve_plan(self, funcs):
+        """
+        Resolve a list of functions into a plan, that can then be run any
+        number of times with `run_plan()`.
+        """
+        return self.resolve_functions(funcs)
+
     def run(self, funcs, state):
         funcs = tuple(funcs)
         try:
-            steps = self.resolver_cache[funcs]
+            plan = self.resolver_cache[funcs]
         except KeyError:
             if not funcs:
                 return
-            steps = self.resolve_functions(funcs)
-            self.resolver_cache[funcs] = steps
+            plan = self.resolve_plan(funcs)
+            self.resolver_cache[funcs] = plan
+
+        state.setdefault('teardown', [])
+        try:
+            return self.run_plan(plan, state)
+        finally:
+            self.teardown(state)
+
+    def run_plan(self, steps, state):
+        if not steps:
+            return
 
         for func, is_async, kwargs, consts, output_name, set_return in steps:
             func_kwargs = {key: state[val] for key, val in kwargs.items()}
@@ -109,28 +317,250 @@ class Injector(BaseInjector):
 
         return state[output_name]
 
+    def teardown(self, state):
+        """
+        Run the remainder of any generator components, in the reverse order
+        to which they were resolved.
+        """
+        generators = state.get('teardown')
+        errors = []
+        while generators:
+            try:
+                finish_generator(generators.pop())
+            except Exception as exc:
+                errors.append(exc)
+        if errors:
+            raise errors[0]
+
 
 class ASyncInjector(Injector):
     allow_async = True
 
+    def __init__(self, components, initial, thread_pool=None, run_in_thread=False, builtin_components=()):
+        super().__init__(components, initial)
+        self.thread_pool = thread_pool
+        self.run_in_thread = run_in_thread
+        # Built-in components don't block, so they stay on the event loop
+        # rather than following the `run_in_thread` default.
+        self.builtin_components = frozenset(builtin_components)
+
+    def resolve_stages(self, funcs):
+        return schedule_steps(self.resolve_functions(funcs))
+
+    def resolve_plan(self, funcs):
+        return self.resolve_stages(funcs)
+
+    def run_plan(self, stages, state):
+        steps = [step for stage in stages for step in stage]
+        return super().run_plan(steps, state)
+
     async def run_async(self, funcs, state):
         funcs = tuple(funcs)
         try:
-            steps = self.resolver_cache[funcs]
+            plan = self.resolver_cache[funcs]
         except KeyError:
             if not funcs:
                 return
-            steps = self.resolve_functions(funcs)
-            self.resolver_cache[funcs] = steps
+            plan = self.resolve_plan(funcs)
+            self.resolver_cache[funcs] = plan
 
-        for func, is_async, kwargs, consts, output_name, set_return in steps:
+        state.setdefault('teardown', [])
+        try:
+            return await self.run_plan_async(plan, state)
+        finally:
+            await self.teardown_async(state)
+
+    async def run_plan_async(self, stages, state):
+        if not stages:
+            return
+
+        for stage in stages:
+            if len(stage) > 1 and is_concurrent(stage):
+                await self.run_stage_async(stage, state)
+                continue
+
+            for func, is_async, kwargs, consts, output_name, set_return in stage:
+                func_kwargs = {key: state[val] for key, val in kwargs.items()}
+                func_kwargs.update(consts)
+                if is_async:
+                    state[output_name] = await func(**func_kwargs)
+                else:
+                    state[output_name] = func(**func_kwargs)
+                if set_return:
+                    state['return_value'] = state[output_name]
+
+        return state[output_name]
+
+    async def teardown_async(self, state):
+        generators = state.get('teardown')
+        errors = []
+        while generators:
+            generator = generators.pop()
+            try:
+                if hasattr(generator, '__anext__'):
+                    await finish_async_generator(generator)
+                else:
+                    finish_generator(generator)
+            except Exception as exc:
+                errors.append(exc)
+        if errors:
+            raise errors[0]
+
+    async def run_stage_async(self, stage, state):
+        """
+        Run the sync steps in a stage, and then all of its async steps
+        concurrently.
+        """
+        coroutines = []
+        output_names = []
+        for func, is_async, kwargs, consts, output_name, set_return in stage:
             func_kwargs = {key: state[val] for key, val in kwargs.items()}
             func_kwargs.update(consts)
             if is_async:
-                state[output_name] = await func(**func_kwargs)
+                coroutines.append(func(**func_kwargs))
+                output_names.append(output_name)
             else:
                 state[output_name] = func(**func_kwargs)
-            if set_return:
-                state['return_value'] = state[output_name]
 
-        return state[output_name]
+        values = await run_concurrently(*coroutines)
+        state.update(zip(output_names, values))
+
+
+class CompiledInjector(Injector):
+    """
+    An injector that generates Python source code for each plan.
+
+    Values are passed between steps using local variables, rather than
+    by reading and writing the `state` dictionary.
+    """
+    def resolve_plan(self, funcs):
+        stages = self.resolve_stages(funcs)
+        return compile_plan(stages, self.initial, is_async=self.allow_async)
+
+    def run_plan(self, plan, state):
+        return plan(state)
+
+    def dump_plan(self, plan):
+        """
+        Return the generated source code for a plan, for debugging.
+        """
+        return plan.__source__
+
+
+class CompiledASyncInjector(CompiledInjector, ASyncInjector):
+    async def run_plan_async(self, plan, state):
+        return await plan(state)
+
+
+def schedule_steps(steps):
+    """
+    Group a list of steps into stages, so that components which do not
+    depend on each other may run concurrently.
+
+    Each top level function runs in a stage of its own, in its original
+    order. The component steps between them are placed in the earliest
+    stage after all of the components they depend on.
+    """
+    stages = []
+    levels = {}
+    start = 0
+
+    for step in steps:
+        func, is_async, kwargs, consts, output_name, set_return = step
+        if set_return:
+            stages.append([step])
+            levels = {}
+            start = len(stages)
+            continue
+
+        level = max([levels[val] + 1 for val in kwargs.values() if val in levels], default=start)
+        if level == len(stages):
+            stages.append([])
+        stages[level].append(step)
+        levels[output_name] = level
+
+    return stages
+
+
+def is_concurrent(stage):
+    """
+    Return `True` if a stage has more than one async step to run.
+    """
+    return sum(1 for step in stage if step[1]) > 1
+
+
+async def run_concurrently(*coroutines):
+    """
+    Run some coroutines concurrently, and return their results in order.
+    If any of them fails then the others are cancelled.
+    """
+    tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
+def compile_plan(stages, initial, is_async=False):
+    builder = CodeBuilder(filename='<injector plan at %#x>' % id(stages))
+    local_names = {}
+    output = None
+
+    def get_local(state_key):
+        if state_key not in local_names:
+            # Values that no earlier step provides come from the initial state.
+            local_names[state_key] = builder.name(re.sub(r'\W', '_', state_key))
+            builder.line('%s = state[%r]' % (local_names[state_key], state_key))
+        return local_names[state_key]
+
+    def get_call(func, kwargs, consts):
+        arguments = ['%s=%s' % (key, get_local(val)) for key, val in kwargs.items()]
+        arguments += ['%s=%s' % (key, builder.const(val)) for key, val in consts.items()]
+        return '%s(%s)' % (builder.const(func, 'func'), ', '.join(arguments))
+
+    def set_output(output_name, output, set_return):
+        local_names[output_name] = output
+        if set_return:
+            local_names['return_value'] = output
+        if output_name in initial:
+            # Keep the state in sync for values the application may inspect.
+            builder.line('state[%r] = %s' % (output_name, output))
+
+    with builder.block('%s plan(state):' % ('async def' if is_async else 'def')):
+        for stage in stages:
+            concurrent = is_concurrent(stage)
+            calls = []
+            for func, step_is_async, kwargs, consts, output_name, set_return in stage:
+                call = get_call(func, kwargs, consts)
+                output = builder.name(re.sub(r'\W', '_', output_name))
+                if concurrent and step_is_async:
+                    calls.append((call, func, output_name, output))
+                    continue
+
+                if step_is_async:
+                    call = 'await ' + call
+                builder.line('# %s' % describe(func))
+                builder.line('%s = %s' % (output, call))
+                set_output(output_name, output, set_return)
+
+            if calls:
+                builder.line('# Concurrently: %s' % ', '.join(describe(func) for _, func, _, _ in calls))
+                builder.line('%s = await %s(%s)' % (
+                    ', '.join(output for _, _, _, output in calls),
+                    builder.const(run_concurrently, 'run_concurrently'),
+                    ', '.join(call for call, _, _, _ in calls)
+                ))
+                for _, _, output_name, output in calls:
+                    set_output(output_name, output, False)
+
+        builder.line('return %s' % output)
+
+    plan = builder.build('plan')
+    plan.steps = [step for stage in stages for step in stage]
+    return plan
+
+
+def describe(func):
+    return getattr(func, '__qualname__', repr(func))
@@ -1,14 +1,28 @@
+import functools
 import inspect
 import re
-from urllib.parse import urlparse
-
-import werkzeug
-from werkzeug.routing import Map, Rule
+from urllib.parse import quote, urlencode
 
 from apistar import exceptions
-from apistar.compat import dict_type
+from apistar.codegen import CodeBuilder
+from apistar.server.cache import LRUCache
 from apistar.server.core import Include, Route
 
+# Each converter is a regex that a path segment must fully match, and a
+# function to convert the matched string into a python value.
+CONVERTERS = {
+    'int': (r'\d+', int),
+    'float': (r'\d+\.\d+', float),
+    'str': (r'[^/]+', str),
+    'path': (r'[^/].*?', str),
+}
+
+# The order in which parameterized segments are tried, when more than one
+# of them could match the same position in a path.
+CONVERTER_PRIORITY = ['int', 'float', 'str']
+
+PARAM_REGEX = re.compile('{([^}]*)}')
+
 
 class BaseRouter():
     def lookup(self, path: str, method: str):
@@ -18,48 +32,151 @@ class BaseRouter():
         raise NotImplementedError()
 
 
-class Router(BaseRouter):
-    def __init__(self, routes):
-        rules = []
-        name_lookups = {}
-
-        for path, name, route in self.walk_routes(routes):
-            path_params = [
-                item.strip('{}') for item in re.findall('{[^}]*}', path)
-            ]
-            args = inspect.signature(route.handler).parameters
-            for path_param in path_params:
-                if path_param.startswith('+'):
-                    path = path.replace(
-                        '{%s}' % path_param,
-                        "<path:%s>" % path_param.lstrip('+')
-                    )
-                elif path_param in args and args[path_param].annotation is int:
-                    path = path.replace(
-                        '{%s}' % path_param,
-                        "<int:%s>" % path_param
-                    )
-                elif path_param in args and args[path_param].annotation is float:
-                    path = path.replace(
-                        '{%s}' % path_param,
-                        "<float:%s>" % path_param
-                    )
-                else:
-                    path = path.replace(
-                        '{%s}' % path_param,
-                        "<string:%s>" % path_param
-                    )
+class RouteNode():
+    """
+    A node in the routing tree. Each node matches a single segment of the
+    path, and has children for each of the segments that may follow it.
+    """
+    def __init__(self):
+        # Literal segments, mapping the segment string to the child node.
+        self.static = {}
+        # `{param}` segments, as (converter, name, regex, convert, node).
+        self.params = []
+        # `{+param}` segments, as (name, node). These match one or more segments.
+        self.paths = []
+        # Segments that mix literal text and params, as (regex, convert, node).
+        self.patterns = []
+        # Templates containing a `{+param}` along with literal text, matched
+        # against the whole of the remainder of the path, as (regex, convert, node).
+        self.tails = []
+        # The routes that end at this node, mapping each method to (name, route).
+        self.methods = {}
+
+    def get_param_child(self, converter, name):
+        for item in self.params:
+            if item[0] == converter and item[1] == name:
+                return item[4]
+
+        regex, convert = CONVERTERS[converter]
+        child = RouteNode()
+        self.params.append((converter, name, re.compile(regex), convert, child))
+        self.params.sort(key=lambda item: CONVERTER_PRIORITY.index(item[0]))
+        return child
+
+    def get_path_child(self, name):
+        for path_name, child in self.paths:
+            if path_name == name:
+                return child
+
+        child = RouteNode()
+        self.paths.append((name, child))
+        return child
+
+
+@functools.lru_cache(maxsize=1024)
+def quote_param(value):
+    return quote(value, safe='/:')
+
+
+def param_to_url(value):
+    return quote_param(value if isinstance(value, str) else str(value))
 
-            rule = Rule(path, methods=[route.method], endpoint=name)
-            rules.append(rule)
-            name_lookups[name] = route
 
-        self.adapter = Map(rules).bind('')
-        self.name_lookups = name_lookups
+def int_to_url(value):
+    return str(int(value))
+
+
+def float_to_url(value):
+    return str(float(value))
+
+
+TO_URL = {
+    'int': int_to_url,
+    'float': float_to_url,
+    'str': param_to_url,
+    'path': param_to_url,
+}
+
+
+class URLBuilder():
+    """
+    Builds URLs for a route. The URL template is split into literal text and
+    param slots up front, and compiled into a function that fills the slots.
+    """
+    def __init__(self, name, url, converters):
+        self.name = name
+        self.format = PARAM_REGEX.sub('%s', url.replace('%', '%%'))
+        self.slots = [
+            (param.lstrip('+'), TO_URL[converters[param.lstrip('+')]])
+            for param in PARAM_REGEX.findall(url)
+        ]
+        self.params = frozenset(converters)
+        self.build = self.compile_build(url)
+
+    def compile_build(self, url):
+        builder = CodeBuilder(filename='<url builder for %s>' % self.name)
+        with builder.block('def build(params):'):
+            if not self.params:
+                # URLs without any params are always the same.
+                with builder.block('if not params:'):
+                    builder.line('return %r' % url)
+            else:
+                with builder.block('if len(params) == %d:' % len(self.params)):
+                    names = []
+                    values = []
+                    with builder.block('try:'):
+                        for param, to_url in self.slots:
+                            value = builder.name('value')
+                            builder.line('%s = params[%r]' % (value, param))
+                            names.append(value)
+                            values.append('%s(%s)' % (builder.const(to_url, 'to_url'), value))
+                    with builder.block('except KeyError:'):
+                        builder.line('pass')
+                    with builder.block('else:'):
+                        condition = ' and '.join('%s is not None' % value for value in names)
+                        with builder.block('if %s:' % condition):
+                            builder.line('return %r %% (%s,)' % (self.format, ', '.join(values)))
+            builder.line('return %s(params)' % builder.const(self.build_with_query, 'build_with_query'))
+        return builder.build('build')
+
+    def build_with_query(self, params):
+        """
+        Build a URL when some params are missing or `None`, or when there are
+        params that aren't in the URL, which are added as a query string.
+        """
+        missing = [param for param in self.params if params.get(param) is None]
+        if missing:
+            msg = 'Missing parameters %s for route "%s".'
+            raise exceptions.NoReverseMatch(msg % (', '.join(sorted(missing)), self.name))
+
+        url = self.format % tuple([to_url(params[param]) for param, to_url in self.slots])
+        query = [(key, value) for key, value in params.items() if key not in self.params and value is not None]
+        if query:
+            url += '?' + urlencode(query)
+        return url
+
+
+class Router(BaseRouter):
+    def __init__(self, routes, cache=None):
+        self.root = RouteNode()
+        self.static_routes = {}
+        self.name_lookups = {}
+        self.reverse_lookups = {}
+        # Every route, as (url, name, route), including any that share a name.
+        self.routes = self.walk_routes(routes)
+
+        for url, name, route in self.routes:
+            converters = self.get_converters(url, route)
+            self.add_route(url, name, route, converters)
+            # If more than one route has the same name, the first is used
+            # for reversing URLs.
+            if name not in self.name_lookups:
+                self.name_lookups[name] = route
+                self.reverse_lookups[name] = URLBuilder(name, url, converters)
 
-        # Use an MRU cache for router lookups.
-        self._lookup_cache = dict_type()
-        self._lookup_cache_size = 10000
+        # Lookups for fully literal URLs are served from `static_routes`, so
+        # the cache only needs to hold matches against parameterized routes.
+        self.cache = LRUCache(10000) if cache is None else cache
 
     def walk_routes(self, routes, url_prefix='', name_prefix=''):
         walked = []
@@ -76,33 +193,183 @@ class Router(BaseRouter):
                 walked.extend(result)
         return walked
 
+    def get_converters(self, url, route):
+        """
+        Return a dictionary mapping each param in the URL to a converter,
+        based on the annotations of the handler function.
+        """
+        converters = {}
+        args = inspect.signature(route.handler).parameters
+        for param in PARAM_REGEX.findall(url):
+            if param.startswith('+'):
+                converters[param.lstrip('+')] = 'path'
+            elif param in args and args[param].annotation is int:
+                converters[param] = 'int'
+            elif param in args and args[param].annotation is float:
+                converters[param] = 'float'
+            else:
+                converters[param] = 'str'
+        return converters
+
+    def add_route(self, url, name, route, converters):
+        segments = url.lstrip('/').split('/')
+        node = self.root
+
+        for index, segment in enumerate(segments):
+            params = PARAM_REGEX.findall(segment)
+            if not params:
+                node = node.static.setdefault(segment, RouteNode())
+            elif segment == '{%s}' % params[0]:
+                if params[0].startswith('+'):
+                    node = node.get_path_child(params[0].lstrip('+'))
+                else:
+                    node = node.get_param_child(converters[params[0]], params[0])
+            elif any(param.startswith('+') for param in params):
+                remainder = '/'.join(segments[index:])
+                regex, convert = self.compile_pattern(remainder, converters)
+                child = RouteNode()
+                node.tails.append((regex, convert, child))
+                node = child
+                break
+            else:
+                regex, convert = self.compile_pattern(segment, converters)
+                child = RouteNode()
+                node.patterns.append((regex, convert, child))
+                node = child
+
+        # If more than one route has the same URL and method, the first wins.
+        # `GET` routes also handle `HEAD` requests.
+        methods = [route.method, 'HEAD'] if route.method == 'GET' else [route.method]
+        for method in methods:
+            node.methods.setdefault(method, (name, route))
+            if not converters:
+                self.static_routes.setdefault(url, {}).setdefault(method, (name, route))
+
+    def compile_pattern(self, template, converters):
+        """
+        Return a regex for a part of a URL template that mixes literal text
+        and params, along with a dictionary of conversion functions.
+        """
+        regex = ''
+        convert = {}
+        for index, part in enumerate(PARAM_REGEX.split(template)):
+            if index % 2 == 0:
+                regex += re.escape(part)
+            else:
+                name = part.lstrip('+')
+                regex += '(?P<%s>%s)' % (name, CONVERTERS[converters[name]][0])
+                convert[name] = CONVERTERS[converters[name]][1]
+        return re.compile(regex), convert
+
+    def search(self, node, segments, index, method, params, allowed):
+        """
+        Return the first route that matches the remainder of the path and
+        the method, trying literal segments before parameterized ones.
+
+        The methods of any routes that match the path but not the method are
+        added to `allowed`.
+        """
+        if index == len(segments):
+            if method in node.methods:
+                return node.methods[method], params
+            allowed.update(node.methods)
+            return None
+
+        segment = segments[index]
+
+        child = node.static.get(segment)
+        if child is not None:
+            result = self.search(child, segments, index + 1, method, params, allowed)
+            if result is not None:
+                return result
+
+        for converter, name, regex, convert, child in node.params:
+            if regex.fullmatch(segment):
+                child_params = dict(params)
+                child_params[name] = convert(segment)
+                result = self.search(child, segments, index + 1, method, child_params, allowed)
+                if result is not None:
+                    return result
+
+        for regex, convert, child in node.patterns:
+            match = regex.fullmatch(segment)
+            if match:
+                child_params = dict(params)
+                child_params.update({key: convert[key](value) for key, value in match.groupdict().items()})
+                result = self.search(child, segments, index + 1, method, child_params, allowed)
+                if result is not None:
+                    return result
+
+        if segment:
+            for name, child in node.paths:
+                # Try the shortest match first, consuming more segments
+                # until the rest of the path matches.
+                for end in range(index + 1, len(segments) + 1):
+                    child_params = dict(params)
+                    child_params[name] = '/'.join(segments[index:end])
+                    result = self.search(child, segments, end, method, child_params, allowed)
+                    if result is not None:
+                        return result
+
+        if node.tails:
+            remainder = '/'.join(segments[index:])
+            for regex, convert, child in node.tails:
+                match = regex.fullmatch(remainder)
+                if match:
+                    child_params = dict(params)
+                    child_params.update({key: convert[key](value) for key, value in match.groupdict().items()})
+                    result = self.search(child, segments, len(segments), method, child_params, allowed)
+                    if result is not None:
+                        return result
+
+        return None
+
+    def match(self, path: str, method: str):
+        if path:
+            path = '/' + path.lstrip('/')
+
+        # Fully literal URLs always take precedence, so may be looked up directly.
+        methods = self.static_routes.get(path)
+        if methods is not None and method in methods:
+            name, route = methods[method]
+            return route, {}
+
+        allowed = set()
+        segments = path[1:].split('/') if path else []
+        result = self.search(self.root, segments, 0, method, {}, allowed)
+        if result is not None:
+            (name, route), path_params = result
+            return route, path_params
+
+        # Redirect to the URL with a trailing slash, if that would match.
+        if not path.endswith('/'):
+            result = self.search(self.root, segments + [''], 0, method, {}, allowed)
+            if result is not None:
+                raise exceptions.Found(quote(path, safe='/:|+') + '/')
+
+        if allowed:
+            raise exceptions.MethodNotAllowed()
+        raise exceptions.NotFound()
+
     def lookup(self, path: str, method: str):
-        lookup_key = method + ' ' + path
+        methods = self.static_routes.get(path)
+        if methods is not None and method in methods:
+            name, route = methods[method]
+            return (route, {})
+
+        lookup_key = (method, path)
         try:
-            return self._lookup_cache[lookup_key]
+            return self.cache[lookup_key]
         except KeyError:
             pass
 
-        try:
-            name, path_params = self.adapter.match(path, method)
-        except werkzeug.exceptions.NotFound:
-            raise exceptions.NotFound() from None
-        except werkzeug.exceptions.MethodNotAllowed:
-            raise exceptions.MethodNotAllowed() from None
-        except werkzeug.routing.RequestRedirect as exc:
-            path = urlparse(exc.new_url).path
-            raise exceptions.Found(path) from None
-
-        route = self.name_lookups[name]
-
-        self._lookup_cache[lookup_key] = (route, path_params)
-        if len(self._lookup_cache) > self._lookup_cache_size:
-            self._lookup_cache.pop(next(iter(self._lookup_cache)))
-
+        route, path_params = self.match(path, method)
+        self.cache[lookup_key] = (route, path_params)
         return (route, path_params)
 
     def reverse_url(self, name: str, **params) -> str:
         try:
-            return self.adapter.build(name, params)
-        except werkzeug.routing.BuildError as exc:
-            raise exceptions.NoReverseMatch(str(exc)) from None
+            builder = self.reverse_lookups[name]
+        except KeyError:
+            raise exceptions.NoReverseMatch('No route named "%s".' % name) from None
+        return builder.build(params)
@@ -0,0 +1,60 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ThreadPool():
+    """
+    A bounded pool of threads, used by `ASyncApp` to run synchronous
+    functions without blocking the event loop.
+    """
+    def __init__(self, max_workers: int=None):
+        if max_workers is None:
+            max_workers = (os.cpu_count() or 1) * 5
+        self.executor = ThreadPoolExecutor(max_workers)
+        self.max_workers = max_workers
+        self.lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+
+    async def run(self, func, kwargs):
+        """
+        Call `func(**kwargs)` in the pool, and return the result.
+        """
+        with self.lock:
+            self.queued += 1
+        future = self.executor.submit(self.call, func, kwargs)
+        future.add_done_callback(self.done)
+        return await asyncio.wrap_future(future)
+
+    def call(self, func, kwargs):
+        with self.lock:
+            self.queued -= 1
+            self.running += 1
+        try:
+            return func(**kwargs)
+        finally:
+            with self.lock:
+                self.running -= 1
+
+    def done(self, future):
+        # Calls that are cancelled before they start never leave the queue.
+        if future.cancelled():
+            with self.lock:
+                self.queued -= 1
+
+    def metrics(self):
+        """
+        Return the number of calls waiting for a thread, and the number
+        currently running.
+        """
+        with self.lock:
+            return {
+                'max_workers': self.max_workers,
+                'queued': self.queued,
+                'running': self.running,
+            }
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
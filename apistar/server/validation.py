@@ -1,4 +1,5 @@
 import inspect
+import io
 import typing
 
 from apistar import codecs, exceptions, http, types, validators
@@ -23,10 +24,13 @@ class RequestDataComponent(Component):
         return parameter.annotation is http.RequestData
 
     def resolve(self,
-                content: http.Body,
+                body_file: http.BodyFile,
                 headers: http.Headers):
-        if not content:
+        body_file.seek(0, io.SEEK_END)
+        content_length = body_file.tell()
+        if not content_length:
             return None
+        body_file.seek(0)
 
         content_type = headers.get('Content-Type')
 
@@ -36,15 +40,16 @@ class RequestDataComponent(Component):
             raise exceptions.UnsupportedMediaType()
 
         try:
-            return codec.decode(content, headers=headers)
+            return codec.decode_file(body_file, headers=headers, content_length=content_length)
         except exceptions.ParseError as exc:
             raise exceptions.BadRequest(str(exc))
 
 
 class ValidatePathParamsComponent(Component):
-    def resolve(self,
-                route: Route,
-                path_params: http.PathParams) -> ValidatedPathParams:
+    def prepare(self, route: Route):
+        route.get_artifact(self, self.build_validator)
+
+    def build_validator(self, route: Route):
         path_fields = route.link.get_path_fields()
 
         validator = validators.Object(
@@ -54,18 +59,25 @@ class ValidatePathParamsComponent(Component):
             ],
             required=[field.name for field in path_fields]
         )
+        return validator.compile()
+
+    def resolve(self,
+                route: Route,
+                path_params: http.PathParams) -> ValidatedPathParams:
+        validate = route.get_artifact(self, self.build_validator)
 
         try:
-            path_params = validator.validate(path_params, allow_coerce=True)
+            path_params = validate(path_params, allow_coerce=True)
         except validators.ValidationError as exc:
             raise exceptions.NotFound(exc.detail)
         return ValidatedPathParams(path_params)
 
 
 class ValidateQueryParamsComponent(Component):
-    def resolve(self,
-                route: Route,
-                query_params: http.QueryParams) -> ValidatedQueryParams:
+    def prepare(self, route: Route):
+        route.get_artifact(self, self.build_validator)
+
+    def build_validator(self, route: Route):
         query_fields = route.link.get_query_fields()
 
         validator = validators.Object(
@@ -75,9 +87,15 @@ class ValidateQueryParamsComponent(Component):
             ],
             required=[field.name for field in query_fields if field.required]
         )
+        return validator.compile()
+
+    def resolve(self,
+                route: Route,
+                query_params: http.QueryParams) -> ValidatedQueryParams:
+        validate = route.get_artifact(self, self.build_validator)
 
         try:
-            query_params = validator.validate(query_params, allow_coerce=True)
+            query_params = validate(query_params, allow_coerce=True)
         except validators.ValidationError as exc:
             raise exceptions.BadRequest(exc.detail)
         return ValidatedQueryParams(query_params)
@@ -98,41 +116,58 @@ class ValidateRequestDataComponent(Component):
         validator = body_field.schema
 
         try:
-            return validator.validate(data, allow_coerce=True)
+            return validator.compile()(data, allow_coerce=True)
         except validators.ValidationError as exc:
             raise exceptions.BadRequest(exc.detail)
 
 
 class PrimitiveParamComponent(Component):
+    def __init__(self):
+        self.validators = {}
+
     def can_handle_parameter(self, parameter: inspect.Parameter):
         return parameter.annotation in (str, int, float, bool, parameter.empty)
 
-    def resolve(self,
-                parameter: inspect.Parameter,
-                path_params: ValidatedPathParams,
-                query_params: ValidatedQueryParams):
-        params = path_params if (parameter.name in path_params) else query_params
-        has_default = parameter.default is not parameter.empty
+    def get_validator(self, parameter: inspect.Parameter):
+        # The validator only depends on the annotation and on whether `None`
+        # is allowed, so we can share compiled validators between handlers.
         allow_null = parameter.default is None
+        key = (parameter.annotation, allow_null)
+        try:
+            return self.validators[key]
+        except KeyError:
+            pass
 
-        param_validator = {
+        validator = {
             parameter.empty: validators.Any(),
             str: validators.String(allow_null=allow_null),
             int: validators.Integer(allow_null=allow_null),
             float: validators.Number(allow_null=allow_null),
             bool: validators.Boolean(allow_null=allow_null)
         }[parameter.annotation]
+        self.validators[key] = validator.compile()
+        return self.validators[key]
 
-        validator = validators.Object(
-            properties=[(parameter.name, param_validator)],
-            required=[] if has_default else [parameter.name]
-        )
+    def resolve(self,
+                parameter: inspect.Parameter,
+                path_params: ValidatedPathParams,
+                query_params: ValidatedQueryParams):
+        params = path_params if (parameter.name in path_params) else query_params
 
+        if parameter.name not in params:
+            if parameter.default is not parameter.empty:
+                return parameter.default
+            message = validators.ErrorMessage(
+                validators.Object.errors['required'].format(field_name=parameter.name),
+                'required'
+            )
+            raise exceptions.NotFound({parameter.name: message})
+
+        validate = self.get_validator(parameter)
         try:
-            params = validator.validate(params, allow_coerce=True)
+            return validate(params[parameter.name], allow_coerce=True)
         except validators.ValidationError as exc:
-            raise exceptions.NotFound(exc.detail)
-        return params.get(parameter.name, parameter.default)
+            raise exceptions.NotFound({parameter.name: exc.detail})
 
 
 class CompositeParamComponent(Component):
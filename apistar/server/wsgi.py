@@ -1,7 +1,7 @@
+import tempfile
 import typing
 from http import HTTPStatus
 from inspect import Parameter
-from urllib.parse import parse_qsl
 from wsgiref.util import request_uri
 
 from werkzeug.wsgi import get_input_stream
@@ -11,6 +11,7 @@ from apistar.server.components import Component
 
 WSGIEnviron = typing.NewType('WSGIEnviron', dict)
 WSGIStartResponse = typing.NewType('WSGIStartResponse', typing.Callable)
+SpooledFile = typing.NewType('SpooledFile', typing.BinaryIO)
 
 
 RESPONSE_STATUS_TEXT = {
@@ -69,8 +70,7 @@ class QueryStringComponent(Component):
 class QueryParamsComponent(Component):
     def resolve(self,
                 environ: WSGIEnviron) -> http.QueryParams:
-        query_string = environ.get('QUERY_STRING', '')
-        return http.QueryParams(parse_qsl(query_string))
+        return http.QueryParams(environ.get('QUERY_STRING', ''))
 
 
 class QueryParamComponent(Component):
@@ -86,15 +86,7 @@ class QueryParamComponent(Component):
 class HeadersComponent(Component):
     def resolve(self,
                 environ: WSGIEnviron) -> http.Headers:
-        header_items = []
-        for key, value in environ.items():
-            if key.startswith('HTTP_'):
-                header = (key[5:].lower().replace('_', '-'), value)
-                header_items.append(header)
-            elif key in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
-                header = (key.lower().replace('_', '-'), value)
-                header_items.append(header)
-        return http.Headers(header_items)
+        return http.WSGIHeaders(environ)
 
 
 class HeaderComponent(Component):
@@ -107,10 +99,74 @@ class HeaderComponent(Component):
         return http.Header(headers[name])
 
 
+class WSGIBodyStream(http.BodyStream):
+    def __init__(self, stream, max_size: int=None, chunk_size: int=65536) -> None:
+        super().__init__(max_size)
+        self.stream = stream
+        self.chunk_size = chunk_size
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> bytes:
+        chunk = self.stream.read(self.chunk_size)
+        if not chunk:
+            raise StopIteration()
+        self.check_chunk(chunk)
+        return chunk
+
+
+class BodyStreamComponent(Component):
+    def __init__(self, max_body_size: int=None) -> None:
+        self.max_body_size = max_body_size
+
+    def resolve(self,
+                environ: WSGIEnviron) -> http.BodyStream:
+        stream = WSGIBodyStream(get_input_stream(environ), self.max_body_size)
+        stream.check_content_length(environ.get('CONTENT_LENGTH'))
+        return stream
+
+
+class SpooledFileComponent(Component):
+    def __init__(self, spool_size: int=http.BODY_SPOOL_SIZE) -> None:
+        self.spool_size = spool_size
+
+    def resolve(self) -> SpooledFile:
+        # Bodies are held in memory, unless they are larger than `spool_size`,
+        # in which case they are written to a temporary file on disk. The file
+        # is closed once the response has been sent.
+        body_file = tempfile.SpooledTemporaryFile(max_size=self.spool_size)
+        try:
+            yield SpooledFile(body_file)
+        finally:
+            body_file.close()
+
+
+class BodyFileComponent(Component):
+    def resolve(self,
+                stream: http.BodyStream,
+                body_file: SpooledFile) -> http.BodyFile:
+        if stream.body is not None:
+            body_file.write(stream.body)
+        else:
+            for chunk in stream:
+                body_file.write(chunk)
+        body_file.seek(0)
+        stream.body_file = body_file
+        return http.BodyFile(body_file)
+
+
 class BodyComponent(Component):
     def resolve(self,
-                environ: WSGIEnviron) -> http.Body:
-        return http.Body(get_input_stream(environ).read())
+                stream: http.BodyStream) -> http.Body:
+        # The body is only spooled if something asks for `BodyFile`.
+        if stream.body is None:
+            if stream.body_file is not None:
+                stream.body_file.seek(0)
+                stream.body = stream.body_file.read()
+            else:
+                stream.body = b''.join(stream)
+        return http.Body(stream.body)
 
 
 class RequestComponent(Component):
@@ -134,6 +190,9 @@ WSGI_COMPONENTS = (
     QueryParamComponent(),
     HeadersComponent(),
     HeaderComponent(),
+    BodyStreamComponent(),
+    SpooledFileComponent(),
+    BodyFileComponent(),
     BodyComponent(),
     RequestComponent()
 )
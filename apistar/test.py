@@ -93,7 +93,12 @@ class _WSGIAdapter(requests.adapters.HTTPAdapter):
         wsgi_response = self.app(environ, start_response)
 
         # Build the underlying urllib3.HTTPResponse
-        raw_kwargs['body'] = io.BytesIO(b''.join(wsgi_response))
+        try:
+            content = b''.join(wsgi_response)
+        finally:
+            if hasattr(wsgi_response, 'close'):
+                wsgi_response.close()
+        raw_kwargs['body'] = io.BytesIO(content)
         raw = requests.packages.urllib3.HTTPResponse(**raw_kwargs)
 
         # Build the requests.Response
@@ -165,7 +170,8 @@ class _ASGIAdapter(requests.adapters.HTTPAdapter):
                 raw_kwargs['preload_content'] = False
                 raw_kwargs['original_response'] = _MockOriginalResponse(raw_kwargs['headers'])
             elif message['type'] == 'http.response.body':
-                raw_kwargs['body'] = io.BytesIO(message['body'])
+                # The body may be sent across several messages.
+                body.write(message.get('body', b''))
             elif message['type'] == 'http.disconnect':
                 pass
             elif message['type'] == 'http.exc_info':
@@ -175,10 +181,13 @@ class _ASGIAdapter(requests.adapters.HTTPAdapter):
                 raise Exception("Unknown ASGI message type: %s" % message['type'])
 
         raw_kwargs = {}
+        body = io.BytesIO()
         connection = self.app(scope)
 
         loop = asyncio.get_event_loop()
         loop.run_until_complete(connection(receive, send))
+        body.seek(0)
+        raw_kwargs['body'] = body
 
         raw = requests.packages.urllib3.HTTPResponse(**raw_kwargs)
         return self.build_response(request, raw)
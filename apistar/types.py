@@ -2,6 +2,7 @@ from abc import ABCMeta
 from collections.abc import Mapping
 
 from apistar import validators
+from apistar.codegen import CodeBuilder
 from apistar.exceptions import ConfigurationError, ValidationError
 
 
@@ -46,12 +47,111 @@ class TypeMetaclass(ABCMeta):
             required=required,
             additional_properties=None
         )
+        compact = any(getattr(base, '_compact', False) for base in bases)
+        if compact and '__slots__' not in attrs:
+            # Compact types store each value in a slot, named after the field.
+            attrs['__slots__'] = tuple([
+                key for key, value in properties
+                if not any(hasattr(base, key) for base in bases)
+            ])
+        attrs['_serialize'] = compile_serializer(name, properties, compact)
+        attrs['_build_trusted'] = staticmethod(compile_trusted_builder(name, properties))
+        attrs['_row_builders'] = {}
         attrs['_creation_counter'] = validators.Validator._creation_counter
         validators.Validator._creation_counter += 1
         return super(TypeMetaclass, cls).__new__(cls, name, bases, attrs)
 
 
+def compile_serializer(name, properties, compact=False):
+    """
+    Generate a method that returns the data of a `Type` instance as a dict
+    that is ready to be encoded as JSON, in a single pass. Only the fields
+    that need formatting, or that contain nested types, are converted.
+    """
+    builder = CodeBuilder(filename='<serializer for %s>' % name)
+    with builder.block('def serialize(self):'):
+        if not compact:
+            builder.line('data = self._dict')
+        items = []
+        for key, validator in properties:
+            source = ('self.%s' % key) if compact else ('data[%r]' % key)
+            value = builder.name('value')
+            expression = serialize_expression(builder, validator, value)
+            if expression is None:
+                items.append('%r: %s' % (key, source))
+            else:
+                builder.line('%s = %s' % (value, source))
+                items.append('%r: %s' % (key, expression))
+        builder.line('return {%s}' % ', '.join(items))
+    return builder.build('serialize')
+
+
+def serialize_expression(builder, validator, value):
+    """
+    Return an expression that serializes `value` for the given validator,
+    or `None` if the value can be used as it is.
+    """
+    if isinstance(validator, type) and issubclass(validator, Type):
+        # Instances built without validation may hold plain dicts, or `None`,
+        # which are used as they are.
+        type_class = builder.const(Type, 'Type')
+        return '%s._serialize() if isinstance(%s, %s) else %s' % (value, value, type_class, value)
+
+    if getattr(validator, 'format', None) in validators.FORMATS:
+        to_string = builder.const(validators.FORMATS[validator.format].to_string, 'to_string')
+        return 'None if %s is None else %s(%s)' % (value, to_string, value)
+
+    if isinstance(validator, validators.Array) and hasattr(validator.items, 'validate'):
+        item = builder.name('item')
+        expression = serialize_expression(builder, validator.items, item)
+        if expression is not None:
+            return 'None if %s is None else [%s for %s in %s]' % (value, expression, item, value)
+
+    return None
+
+
+def compile_trusted_builder(name, properties, fields=None):
+    """
+    Generate a function that returns the data for a `Type` instance, without
+    validation, filling in any defaults for missing fields.
+
+    By default the function takes a mapping. If `fields` is given then it
+    instead takes a sequence of values, one for each of the named fields.
+    """
+    builder = CodeBuilder(filename='<trusted builder for %s>' % name)
+    argument = 'value' if fields is None else 'row'
+    with builder.block('def build(%s):' % argument):
+        items = []
+        for key, validator in properties:
+            if fields is not None and key in fields:
+                items.append('%r: row[%d]' % (key, fields.index(key)))
+            elif fields is None and validator.has_default():
+                default = builder.const(validator.default, 'default')
+                items.append('%r: value.get(%r, %s)' % (key, key, default))
+            elif fields is None:
+                items.append('%r: value[%r]' % (key, key))
+            elif validator.has_default():
+                items.append('%r: %s' % (key, builder.const(validator.default, 'default')))
+            else:
+                msg = 'Field "%s" on Type "%s" is required, and has no default.'
+                raise ConfigurationError(msg % (key, name))
+        builder.line('return {%s}' % ', '.join(items))
+    return builder.build('build')
+
+
+def to_string(validator, value):
+    """
+    Return the string representation of a value, for validators with a format
+    that has one, such as dates and times.
+    """
+    if value is not None and getattr(validator, 'format', None) in validators.FORMATS:
+        return validators.FORMATS[validator.format].to_string(value)
+    return value
+
+
 class Type(Mapping, metaclass=TypeMetaclass):
+    __slots__ = ('_dict',)
+
     def __init__(self, *args, **kwargs):
         definitions = None
         allow_coerce = False
@@ -77,9 +177,63 @@ class Type(Mapping, metaclass=TypeMetaclass):
             # Instantiated with keyword arguments.
             value = kwargs
 
-        value = self.validator.validate(value)
+        value = self.validator.compile()(value)
         object.__setattr__(self, '_dict', value)
 
+    @classmethod
+    def from_trusted(cls, value):
+        """
+        Return an instance for data that is already known to be valid, such
+        as records loaded from your own database, without validating it.
+        Missing fields are filled in with their defaults. Values, including
+        any plain dicts given for nested types, are stored as they are.
+        """
+        try:
+            data = cls._build_trusted(value)
+        except KeyError as exc:
+            raise ValidationError({exc.args[0]: 'This field is required.'}) from None
+        instance = cls.__new__(cls)
+        object.__setattr__(instance, '_dict', data)
+        return instance
+
+    @classmethod
+    def construct(cls, **kwargs):
+        """
+        Return an instance for the given field values, without validating
+        them. Missing fields are filled in with their defaults.
+        """
+        return cls.from_trusted(kwargs)
+
+    @classmethod
+    def construct_many(cls, rows, fields=None):
+        """
+        Return a list of instances for a sequence of rows, such as tuples
+        returned by a database query, without validating them. Each row
+        contains a value for each of `fields` in turn, which defaults to all
+        of the fields on the type. Any other fields are filled in with their
+        defaults.
+        """
+        fields = tuple(cls.validator.properties) if fields is None else tuple(fields)
+        try:
+            build = cls._row_builders[fields]
+        except KeyError:
+            unknown = [key for key in fields if key not in cls.validator.properties]
+            if unknown:
+                msg = 'Unknown fields %s for Type "%s".'
+                raise ConfigurationError(msg % (', '.join(unknown), cls.__name__)) from None
+            properties = list(cls.validator.properties.items())
+            build = compile_trusted_builder(cls.__name__, properties, fields)
+            cls._row_builders[fields] = build
+
+        new = cls.__new__
+        set_data = object.__setattr__
+        instances = []
+        for row in rows:
+            instance = new(cls)
+            set_data(instance, '_dict', build(row))
+            instances.append(instance)
+        return instances
+
     @classmethod
     def validate(cls, value, definitions=None, allow_coerce=False):
         return cls(value, definitions=definitions, allow_coerce=allow_coerce)
@@ -112,17 +266,59 @@ class Type(Mapping, metaclass=TypeMetaclass):
             raise AttributeError('Invalid attribute "%s"' % key)
 
     def __getitem__(self, key):
-        value = self._dict[key]
-        if value is None:
-            return None
-        validator = self.validator.properties[key]
-        if hasattr(validator, 'format') and validator.format in validators.FORMATS:
-            formatter = validators.FORMATS[validator.format]
-            return formatter.to_string(value)
-        return value
+        return to_string(self.validator.properties[key], self._dict[key])
 
     def __len__(self):
         return len(self._dict)
 
     def __iter__(self):
         return iter(self._dict)
+
+    def __getstate__(self):
+        return self._dict
+
+    def __setstate__(self, state):
+        object.__setattr__(self, '_dict', state)
+
+
+class CompactType(Type):
+    """
+    A `Type` that stores its values in slots, rather than in a dictionary, so
+    that instances use far less memory, and attribute access is faster.
+    """
+    __slots__ = ()
+    _compact = True
+
+    @property
+    def _dict(self):
+        return {key: getattr(self, key) for key in self.validator.properties}
+
+    @_dict.setter
+    def _dict(self, value):
+        for key in self.validator.properties:
+            object.__setattr__(self, key, value[key])
+
+    def __setattr__(self, key, value):
+        if key not in self.validator.properties:
+            raise AttributeError('Invalid attribute "%s"' % key)
+        value = self.validator.properties[key].validate(value)
+        object.__setattr__(self, key, value)
+
+    def __setitem__(self, key, value):
+        if key not in self.validator.properties:
+            raise KeyError('Invalid key "%s"' % key)
+        value = self.validator.properties[key].validate(value)
+        object.__setattr__(self, key, value)
+
+    def __getattr__(self, key):
+        raise AttributeError('Invalid attribute "%s"' % key)
+
+    def __getitem__(self, key):
+        validator = self.validator.properties[key]
+        return to_string(validator, getattr(self, key))
+
+    def __len__(self):
+        return len(self.validator.properties)
+
+    def __iter__(self):
+        return iter(self.validator.properties)
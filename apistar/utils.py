@@ -7,7 +7,7 @@ from apistar.types import Type
 class _CustomEncoder(json.JSONEncoder):
     def default(self, obj):
         if isinstance(obj, Type):
-            return dict(obj)
+            return obj._serialize()
         return json.JSONEncoder.default(self, obj)
 
 
@@ -21,6 +21,9 @@ class ErrorMessage(str):
         instance.code = code
         return instance
 
+    def __getnewargs__(self):
+        return (str(self), self.code)
+
 
 class Validator:
     errors = {}
@@ -55,6 +58,73 @@ class Validator:
     def validate(self, value, definitions=None, allow_coerce=False):
         raise NotImplementedError()
 
+    def compile(self):
+        """
+        Return a function with the same signature and behavior as `validate()`,
+        generated specifically for this validator's configuration.
+
+        Validators should not be modified once they have been compiled.
+        """
+        try:
+            return self._compiled
+        except AttributeError:
+            from apistar.compiler import compile_validator
+            self._compiled = compile_validator(self)
+            return self._compiled
+
+    def validate_many(self, values, definitions=None, allow_coerce=False,
+                      max_errors=None, processes=None, chunk_size=1000):
+        """
+        Validate each item in a sequence of values, returning a list of the
+        validated items. Errors are raised together, keyed by index, as
+        with `Array`. Validation stops once `max_errors` have been found.
+
+        If `processes` is set, the values are split into chunks of
+        `chunk_size`, which are validated in a pool of that many processes.
+        """
+        definitions = self.get_definitions(definitions)
+        if processes is None:
+            validated, errors = validate_chunk(self, values, 0, definitions, allow_coerce, max_errors)
+        else:
+            validated, errors = self.validate_many_in_processes(
+                values, definitions, allow_coerce, max_errors, processes, chunk_size
+            )
+        if errors:
+            raise ValidationError(errors)
+        return validated
+
+    def validate_many_in_processes(self, values, definitions, allow_coerce, max_errors, processes, chunk_size):
+        from concurrent.futures import ProcessPoolExecutor
+
+        if not isinstance(values, (list, tuple)):
+            values = list(values)
+        validated = []
+        errors = {}
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = [
+                executor.submit(
+                    validate_chunk, self, values[start:start + chunk_size],
+                    start, definitions, allow_coerce, max_errors
+                )
+                for start in range(0, len(values), chunk_size)
+            ]
+            for future in futures:
+                chunk_validated, chunk_errors = future.result()
+                validated.extend(chunk_validated)
+                errors.update(chunk_errors)
+                if max_errors is not None and len(errors) >= max_errors:
+                    errors = {index: errors[index] for index in sorted(errors)[:max_errors]}
+                    for remaining in futures:
+                        remaining.cancel()
+                    break
+        return validated, errors
+
+    def __getstate__(self):
+        # Compiled functions can't be pickled, and are rebuilt when needed.
+        state = dict(self.__dict__)
+        state.pop('_compiled', None)
+        return state
+
     def is_valid(self, value):
         try:
             self.validate(value)
@@ -99,6 +169,24 @@ class Validator:
         return Union(items)
 
 
+def validate_chunk(validator, values, offset, definitions, allow_coerce, max_errors):
+    """
+    Validate a sequence of values, returning a list of the valid items, and a
+    dictionary of errors keyed by index, starting from `offset`.
+    """
+    validate = validator.compile()
+    validated = []
+    errors = {}
+    for index, value in enumerate(values, offset):
+        try:
+            validated.append(validate(value, definitions, allow_coerce))
+        except ValidationError as exc:
+            errors[index] = exc.detail
+            if max_errors is not None and len(errors) >= max_errors:
+                break
+    return validated, errors
+
+
 class String(Validator):
     errors = {
         'type': 'Must be a string.',
@@ -293,7 +381,7 @@ class Boolean(Validator):
         elif not isinstance(value, bool):
             if allow_coerce and isinstance(value, str):
                 if self.allow_null:
-                    values = dict(self.value)
+                    values = dict(self.values)
                     values.update(self.null_values)
                 else:
                     values = self.values
@@ -0,0 +1,75 @@
+"""
+Compare the interpreted injector against code-generated plans, running a
+pipeline of ten chained components.
+
+    PYTHONPATH=. python benchmarks/bench_injector.py
+"""
+import asyncio
+import timeit
+
+from apistar.server.components import Component
+from apistar.server.injector import (
+    ASyncInjector, CompiledASyncInjector, CompiledInjector, Injector
+)
+
+
+class Value(int):
+    pass
+
+
+def make_component(index, parent):
+    """
+    Return a component that resolves a new `Value` subclass from its parent.
+    """
+    output = type('Value%d' % index, (Value,), {})
+
+    def resolve(self, value: parent) -> output:
+        return output(value + 1)
+
+    component = type('Component%d' % index, (Component,), {'resolve': resolve})()
+    return component, output
+
+
+def build_pipeline(length=10):
+    components = []
+    annotation = int
+    for index in range(length):
+        component, annotation = make_component(index, annotation)
+        components.append(component)
+
+    def handler(value: annotation) -> int:
+        return value
+
+    return components, handler
+
+
+def bench(func, number=20000):
+    seconds = min(timeit.repeat(func, number=number, repeat=5))
+    return seconds / number * 1e6
+
+
+def main():
+    components, handler = build_pipeline()
+    initial = {'start': int}
+    loop = asyncio.get_event_loop()
+
+    print('%-8s %16s %16s %8s' % ('mode', 'interpreted (us)', 'compiled (us)', 'speedup'))
+
+    interpreted = Injector(components, initial)
+    compiled = CompiledInjector(components, initial)
+    plans = [(injector, injector.resolve_plan([handler])) for injector in (interpreted, compiled)]
+    timings = [bench(lambda: injector.run_plan(plan, {'start': 0})) for injector, plan in plans]
+    print('%-8s %16.2f %16.2f %7.1fx' % ('sync', timings[0], timings[1], timings[0] / timings[1]))
+
+    interpreted = ASyncInjector(components, initial)
+    compiled = CompiledASyncInjector(components, initial)
+    plans = [(injector, injector.resolve_plan([handler])) for injector in (interpreted, compiled)]
+    timings = [
+        bench(lambda: loop.run_until_complete(injector.run_plan_async(plan, {'start': 0})), number=5000)
+        for injector, plan in plans
+    ]
+    print('%-8s %16.2f %16.2f %7.1fx' % ('async', timings[0], timings[1], timings[0] / timings[1]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Compare the installed JSON backends, encoding and decoding a realistic list
+response, along with the standard library decoding to ordered dictionaries.
+
+    PYTHONPATH=. python benchmarks/bench_json.py
+"""
+import datetime
+import timeit
+
+from apistar import jsonbackends, types, validators
+
+
+class Product(types.Type):
+    id = validators.Integer()
+    name = validators.String()
+    description = validators.String()
+    price = validators.Number()
+    in_stock = validators.Boolean()
+    tags = validators.Array(items=validators.String())
+    created = validators.DateTime()
+
+
+def build_payload(count):
+    created = datetime.datetime(2018, 5, 1, 12, 30)
+    return [
+        Product(
+            id=index,
+            name='Product %d' % index,
+            description='A product, described at some length, with unicode: café.',
+            price=index * 1.25,
+            in_stock=index % 2 == 0,
+            tags=['tag%d' % tag for tag in range(index % 5)],
+            created=created,
+        ) for index in range(count)
+    ]
+
+
+def default(obj):
+    if isinstance(obj, types.Type):
+        return dict(obj)
+    raise TypeError()
+
+
+def bench(func, number):
+    seconds = min(timeit.repeat(func, number=number, repeat=5))
+    return seconds / number * 1e3
+
+
+def main():
+    print('%-10s %-8s %12s %12s' % ('backend', 'items', 'dumps (ms)', 'loads (ms)'))
+    for count in (10, 1000):
+        payload = build_payload(count)
+        number = 10000 // count
+        content = jsonbackends.stdlib.dumps(payload, default=default)
+        for name, backend in jsonbackends.BACKENDS.items():
+            dumps = bench(lambda: backend.dumps(payload, default=default), number)
+            loads = bench(lambda: backend.loads(content), number)
+            print('%-10s %-8d %12.3f %12.3f' % (name, count, dumps, loads))
+        ordered = bench(lambda: jsonbackends.loads(content, ordered=True), number)
+        print('%-10s %-8d %12s %12.3f' % ('ordered', count, '-', ordered))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Time reverse URL generation, for routes with and without params, against
+werkzeug's `MapAdapter.build`, which the router replaced.
+
+    PYTHONPATH=. python benchmarks/bench_reverse_url.py
+"""
+import timeit
+
+from werkzeug.routing import Map, Rule
+
+from apistar import App, Route
+
+
+def get_user(user_id: int):
+    pass
+
+
+def list_users():
+    pass
+
+
+routes = [
+    Route('/users/', 'GET', list_users),
+    Route('/users/{user_id}/', 'GET', get_user),
+]
+
+app = App(routes=routes)
+
+adapter = Map([
+    Rule('/users/', methods=['GET'], endpoint='list_users'),
+    Rule('/users/<int:user_id>/', methods=['GET'], endpoint='get_user'),
+    Rule('/static/<path:filename>', methods=['GET'], endpoint='static'),
+]).bind('')
+
+CASES = [
+    (
+        'no params',
+        lambda: app.reverse_url('list_users'),
+        lambda: adapter.build('list_users'),
+    ),
+    (
+        'int param',
+        lambda: app.reverse_url('get_user', user_id=123),
+        lambda: adapter.build('get_user', {'user_id': 123}),
+    ),
+    (
+        'static_url',
+        lambda: app.static_url('css/apistar.css'),
+        lambda: adapter.build('static', {'filename': 'css/apistar.css'}),
+    ),
+]
+
+
+def bench(func, number=100000):
+    seconds = min(timeit.repeat(func, number=number, repeat=5))
+    return seconds / number * 1e6
+
+
+def main():
+    print('%-12s %12s %15s %8s' % ('case', 'apistar (us)', 'werkzeug (us)', 'speedup'))
+    for name, func, werkzeug_func in CASES:
+        assert func() == werkzeug_func()
+        apistar_time = bench(func)
+        werkzeug_time = bench(werkzeug_func)
+        print('%-12s %12.3f %15.3f %7.1fx' % (name, apistar_time, werkzeug_time, werkzeug_time / apistar_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Compare the routing tree against werkzeug's `Map`, with increasing numbers
+of routes. The lookup cache is bypassed, so that each lookup is a full match.
+
+    PYTHONPATH=. python benchmarks/bench_router.py
+"""
+import timeit
+
+from werkzeug.routing import Map, Rule
+
+from apistar import Route
+from apistar.server.router import Router
+
+
+def get_item(item_id: int):
+    pass
+
+
+def list_items():
+    pass
+
+
+def build_routes(count):
+    routes = []
+    for index in range(count // 2):
+        routes.append(Route('/resource%d/' % index, 'GET', list_items, name='list%d' % index))
+        routes.append(Route('/resource%d/{item_id}/' % index, 'GET', get_item, name='get%d' % index))
+    return routes
+
+
+def build_werkzeug_map(routes):
+    rules = [
+        Rule(route.url.replace('{item_id}', '<int:item_id>'), methods=[route.method], endpoint=route.name)
+        for route in routes
+    ]
+    return Map(rules).bind('')
+
+
+def bench(func, number=2000):
+    seconds = min(timeit.repeat(func, number=number, repeat=5))
+    return seconds / number * 1e6
+
+
+def main():
+    print('%-8s %-8s %16s %12s %8s' % ('routes', 'path', 'werkzeug (us)', 'tree (us)', 'speedup'))
+    for count in (10, 100, 2000):
+        routes = build_routes(count)
+        router = Router(routes)
+        adapter = build_werkzeug_map(routes)
+        last = count // 2 - 1
+        for kind, path in (('static', '/resource%d/' % last), ('param', '/resource%d/123/' % last)):
+            werkzeug = bench(lambda: adapter.match(path, 'GET'))
+            tree = bench(lambda: router.match(path, 'GET'))
+            print('%-8d %-8s %16.2f %12.2f %7.1fx' % (count, kind, werkzeug, tree, werkzeug / tree))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Compare the memory used by `Type` and `CompactType` instances, along with
+the speed of attribute and item access, and serialization.
+
+    PYTHONPATH=. python benchmarks/bench_types.py
+"""
+import datetime
+import timeit
+import tracemalloc
+
+from apistar import types, validators
+
+FIELDS = {
+    'id': validators.Integer(),
+    'name': validators.String(),
+    'price': validators.Number(),
+    'in_stock': validators.Boolean(),
+    'created': validators.DateTime(),
+}
+
+Product = type('Product', (types.Type,), dict(FIELDS))
+CompactProduct = type('CompactProduct', (types.CompactType,), dict(FIELDS))
+
+VALUE = {
+    'id': 1,
+    'name': 'Product',
+    'price': 1.25,
+    'in_stock': True,
+    'created': datetime.datetime(2018, 5, 1, 12, 30),
+}
+
+
+def measure_memory(cls, count):
+    tracemalloc.start()
+    instances = [cls(VALUE) for index in range(count)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del instances
+    return size / count
+
+
+def bench(func, number=100000):
+    seconds = min(timeit.repeat(func, number=number, repeat=5))
+    return seconds / number * 1e9
+
+
+def main():
+    print('%-16s %14s %12s %12s %16s' % ('class', 'bytes/object', 'attr (ns)', 'item (ns)', 'serialize (ns)'))
+    for cls in (Product, CompactProduct):
+        instance = cls(VALUE)
+        print('%-16s %14.0f %12.1f %12.1f %16.1f' % (
+            cls.__name__,
+            measure_memory(cls, 100000),
+            bench(lambda: instance.name),
+            bench(lambda: instance['name']),
+            bench(instance._serialize),
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Compare compiled validators against the interpreted `validate()` path.
+
+    PYTHONPATH=. python benchmarks/bench_validators.py
+"""
+import timeit
+
+from apistar import types, validators
+
+
+class Address(types.Type):
+    street = validators.String(max_length=100)
+    city = validators.String(max_length=100)
+    postcode = validators.String(pattern='^[A-Z0-9 ]+$', max_length=10)
+
+
+class Order(types.Type):
+    id = validators.Integer(minimum=1)
+    customer = validators.String(min_length=1, max_length=100)
+    email = validators.String(pattern='^[^@]+@[^@]+$')
+    status = validators.String(enum=['open', 'paid', 'shipped'])
+    total = validators.Number(minimum=0.0)
+    quantity = validators.Integer(minimum=1, maximum=1000)
+    express = validators.Boolean(default=False)
+    created = validators.DateTime()
+    notes = validators.String(allow_null=True, default=None)
+    tags = validators.Array(items=validators.String(max_length=20), unique_items=True, default=[])
+
+
+ORDER = {
+    'id': 123,
+    'customer': 'Jane Doe',
+    'email': 'jane@example.com',
+    'status': 'paid',
+    'total': 99.95,
+    'quantity': 3,
+    'express': True,
+    'created': '2018-06-01T12:30:00Z',
+    'notes': None,
+    'tags': ['gift', 'priority'],
+}
+
+SCHEMAS = [
+    ('string', validators.String(max_length=100), 'example'),
+    ('integer', validators.Integer(minimum=0, maximum=1000), 500),
+    ('object', Order.validator, ORDER),
+    ('array', validators.Array(items=Order.validator), [ORDER] * 100),
+]
+
+
+def bench(func, value, number):
+    seconds = min(timeit.repeat(lambda: func(value), number=number, repeat=5))
+    return seconds / number * 1e6
+
+
+def main():
+    print('%-10s %14s %14s %8s' % ('schema', 'validate (us)', 'compiled (us)', 'speedup'))
+    for name, validator, value in SCHEMAS:
+        number = 100 if name == 'array' else 10000
+        interpreted = bench(validator.validate, value, number)
+        compiled = bench(validator.compile(), value, number)
+        print('%-10s %14.2f %14.2f %7.1fx' % (name, interpreted, compiled, interpreted / compiled))
+
+
+if __name__ == '__main__':
+    main()
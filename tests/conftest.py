@@ -0,0 +1,30 @@
+import pytest
+
+from apistar import App, ASyncApp
+from apistar.server.injector import CompiledASyncInjector, CompiledInjector
+
+
+class CompiledApp(App):
+    injector_class = CompiledInjector
+
+
+class CompiledASyncApp(ASyncApp):
+    injector_class = CompiledASyncInjector
+
+
+APP_CLASSES = {
+    'wsgi': App,
+    'asgi': ASyncApp,
+    'wsgi-compiled': CompiledApp,
+    'asgi-compiled': CompiledASyncApp,
+}
+
+
+@pytest.fixture(scope='module', params=list(APP_CLASSES))
+def app_class(request):
+    """
+    Each of the application classes, including those using the compiled
+    injectors. Tests that only apply to some of them can select them with
+    `@pytest.mark.parametrize('app_class', [...], indirect=True)`.
+    """
+    return APP_CLASSES[request.param]
@@ -0,0 +1,200 @@
+import datetime
+import pickle
+
+import pytest
+
+from apistar import types, validators
+from apistar.codecs import JSONSchemaCodec
+from apistar.exceptions import ValidationError
+
+
+class Location(types.Type):
+    latitude = validators.Number(maximum=90.0, minimum=-90.0)
+    longitude = validators.Number(maximum=180.0, minimum=-180.0)
+
+
+class Place(types.Type):
+    name = validators.String(max_length=100)
+    location = Location
+    tags = validators.Array(items=validators.String(), unique_items=True, default=[])
+
+
+def outcome(func, value, **kwargs):
+    try:
+        return ('valid', func(value, **kwargs))
+    except ValidationError as exc:
+        return ('invalid', exc.detail)
+
+
+cases = [
+    (validators.String(), ['abc', '', 1, None]),
+    (validators.String(allow_null=True), [None, 'abc']),
+    (validators.String(min_length=1), ['', 'a']),
+    (validators.String(min_length=3, max_length=5), ['ab', 'abc', 'abcdef']),
+    (validators.String(pattern='^[a-z]+$'), ['abc', 'ABC']),
+    (validators.String(enum=['red', 'green']), ['red', 'blue']),
+    (validators.Date(), ['2020-01-01', '2020-1-1x', 'x', datetime.date(2020, 1, 1)]),
+    (validators.DateTime(), ['2020-01-01T12:00:00Z', '2020-01-01T12:00:00+01:00', 'x']),
+    (validators.Integer(), [1, 1.0, 1.5, True, '1', None, float('inf')]),
+    (validators.Integer(minimum=0, maximum=10), [-1, 0, 10, 11]),
+    (validators.Integer(minimum=0, maximum=10, exclusive_minimum=True, exclusive_maximum=True), [0, 1, 9, 10]),
+    (validators.Integer(multiple_of=3), [3, 4]),
+    (validators.Number(multiple_of=0.1), [0.3, 0.35]),
+    (validators.Number(), [1, 1.5, 'abc', float('nan')]),
+    (validators.Boolean(), [True, False, 'true', 1, None]),
+    (validators.Boolean(allow_null=True), [None, 'null', '', 'off']),
+    (validators.Any(), [1, 'a', None]),
+    (validators.Object(), [{}, {'a': 1}, [], None, {1: 'a'}]),
+    (validators.Object(min_properties=1), [{}, {'a': 1}]),
+    (validators.Object(min_properties=2, max_properties=3), [{'a': 1}, {'a': 1, 'b': 2, 'c': 3, 'd': 4}]),
+    (validators.Object(
+        properties={'a': validators.Integer(), 'b': validators.String(default='x')},
+        required=['a'],
+        additional_properties=False
+    ), [{'a': 1}, {'a': 'x', 'b': 1}, {}, {'a': 1, 'c': 2}]),
+    (validators.Object(
+        pattern_properties={'^x-': validators.Integer()},
+        additional_properties=validators.String()
+    ), [{'x-a': 1, 'b': 'c'}, {'x-a': 'a', 'b': 1}]),
+    (validators.Array(), [[], [1, 'a'], {}, None]),
+    (validators.Array(min_items=1), [[], [1]]),
+    (validators.Array(min_items=2, max_items=2), [[1], [1, 2], [1, 2, 3]]),
+    (validators.Array(items=validators.Integer(), unique_items=True), [[1, 2], [1, 1], [1, 'a']]),
+    (validators.Array(
+        items=[validators.Integer(), validators.String()],
+        additional_items=False
+    ), [[1, 'a'], ['a', 1], [1, 'a', 2]]),
+    (validators.Array(
+        items=[validators.Integer()],
+        additional_items=validators.String()
+    ), [[1, 'a', 'b'], [1, 2]]),
+    (validators.Integer() | validators.String(), [1, 'a', None, []]),
+    (validators.Union([validators.Integer(), validators.String()], allow_null=True), [None, 1]),
+    (validators.Object(
+        def_name='Node',
+        properties={
+            'value': validators.Integer(),
+            'children': validators.Array(items=validators.Ref('Node'))
+        }
+    ), [{'value': 1, 'children': [{'value': 2, 'children': []}]}, {'value': 1, 'children': [{'value': 'x'}]}]),
+    (validators.Object(
+        additional_properties=validators.Object(additional_properties=validators.Integer())
+    ), [{'a': {'b': 1}}, {'a': {'b': 1, 'c': 2}, 'd': {}}, {'a': {'b': 'x'}}]),
+    (validators.Object(
+        pattern_properties={'^x-': validators.Object(pattern_properties={'^y-': validators.Integer()})}
+    ), [{'x-a': {'y-b': 1}}, {'x-a': {'y-b': 'x', 'z': 1}}]),
+    (validators.Object(
+        properties={'a': validators.Object(additional_properties=False)},
+        additional_properties=validators.Integer()
+    ), [{'a': {}, 'b': 1}, {'a': {'c': 1}, 'b': 'x'}]),
+    (validators.Array(items=validators.Array(items=validators.Integer())), [[[1, 2], [1]], [[1, 2, 'x'], [1]]]),
+    (validators.Array(
+        items=[validators.Array(items=[validators.Integer(), validators.String()])],
+        additional_items=validators.Integer()
+    ), [[[1, 'a'], 2], [[1, 2], 'b']]),
+    (Place.validator, [
+        {'name': 'home', 'location': {'latitude': 1.0, 'longitude': 2.0}},
+        {'name': 'home', 'location': {'latitude': 100.0, 'longitude': 2.0}, 'tags': ['a', 'a']},
+        {'location': None},
+    ]),
+]
+
+
+@pytest.mark.parametrize('validator,values', cases)
+def test_compiled_matches_validate(validator, values):
+    compiled = validator.compile()
+    for value in values:
+        for allow_coerce in (False, True):
+            expected = outcome(validator.validate, value, allow_coerce=allow_coerce)
+            assert outcome(compiled, value, allow_coerce=allow_coerce) == expected
+
+
+def test_compiled_type_with_nested_objects():
+    class Settings(types.Type):
+        options = validators.Object(additional_properties=validators.Object())
+
+    assert Settings({'options': {'outer': {'inner': 1}}}).options == {'outer': {'inner': 1}}
+
+
+def test_compile_is_cached():
+    validator = validators.String(max_length=10)
+    assert validator.compile() is validator.compile()
+
+
+def test_compiled_source_omits_unset_constraints():
+    source = validators.String(max_length=10).compile().__source__
+    assert 'len(value) > 10' in source
+    assert 'pattern' not in source
+    assert 'enum' not in source
+
+
+def test_compiled_json_schema():
+    validator = JSONSchemaCodec().decode_from_data_structure({
+        'type': 'object',
+        'properties': {'a': {'type': 'integer', 'minimum': 0}},
+        'required': ['a']
+    })
+    assert validator.compile()({'a': 1}) == {'a': 1}
+    with pytest.raises(ValidationError) as exc:
+        validator.compile()({'a': -1})
+    assert exc.value.detail == {'a': 'Must be greater than or equal to 0.0.'}
+
+
+def test_validate_many():
+    validator = validators.Integer(minimum=0)
+    assert validator.validate_many([1, 2, 3]) == [1, 2, 3]
+    assert validator.validate_many(['1', '2'], allow_coerce=True) == [1, 2]
+
+    with pytest.raises(ValidationError) as exc:
+        validator.validate_many([1, -1, 'a', -2])
+    assert exc.value.detail == {
+        1: 'Must be greater than or equal to 0.',
+        2: 'Must be a number.',
+        3: 'Must be greater than or equal to 0.',
+    }
+
+    with pytest.raises(ValidationError) as exc:
+        validator.validate_many([1, -1, 'a', -2], max_errors=2)
+    assert list(exc.value.detail) == [1, 2]
+
+
+def test_validate_many_types():
+    values = [
+        {'name': 'Brighton', 'location': {'latitude': 50.8225, 'longitude': -0.1372}},
+        {'name': 'Nowhere', 'location': {'latitude': 100.0, 'longitude': 0.0}},
+    ]
+    with pytest.raises(ValidationError) as exc:
+        Place.validator.validate_many(values)
+    assert exc.value.detail == {1: {'location': {'latitude': 'Must be less than or equal to 90.0.'}}}
+
+    validated = Place.validator.validate_many(values[:1])
+    assert validated == [{
+        'name': 'Brighton',
+        'location': Location(latitude=50.8225, longitude=-0.1372),
+        'tags': [],
+    }]
+
+
+def test_validate_many_in_processes():
+    validator = validators.Integer(minimum=0)
+    values = list(range(100))
+    assert validator.validate_many(values, processes=2, chunk_size=30) == values
+
+    values[10] = values[50] = values[90] = -1
+    with pytest.raises(ValidationError) as exc:
+        validator.validate_many(values, processes=2, chunk_size=30)
+    assert list(exc.value.detail) == [10, 50, 90]
+    assert exc.value.detail[10].code == 'minimum'
+
+    with pytest.raises(ValidationError) as exc:
+        validator.validate_many(iter(values), processes=2, chunk_size=30, max_errors=2)
+    assert list(exc.value.detail) == [10, 50]
+
+
+def test_pickle_compiled_validator():
+    validator = Place.validator
+    validator.compile()
+    restored = pickle.loads(pickle.dumps(validator))
+    assert not hasattr(restored, '_compiled')
+    assert hasattr(validator, '_compiled')
+    assert restored.compile()({'name': 'a', 'location': {'latitude': 1, 'longitude': 2}})['name'] == 'a'
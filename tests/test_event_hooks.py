@@ -1,6 +1,7 @@
 import pytest
 
-from apistar import App, Route, http, test
+from apistar import App, ASyncApp, Route, http, test
+from apistar.exceptions import ConfigurationError
 
 ON_ERROR = None
 
@@ -50,3 +51,143 @@ def test_on_error():
     with pytest.raises(AssertionError):
         client.get('/error')
     assert ON_ERROR == 'Ran on_error'
+
+
+class CountingHook():
+    instances = 0
+
+    def __init__(self):
+        CountingHook.instances += 1
+        self.seen = []
+
+    def on_request(self, route: Route):
+        self.seen.append(route.name)
+
+    def on_response(self, response: http.Response):
+        response.headers['Seen'] = ','.join(self.seen)
+
+
+def test_route_pipeline_is_resolved_once(app_class):
+    app = app_class(routes=routes, event_hooks=[CountingHook])
+    client = test.TestClient(app)
+
+    for _ in range(3):
+        instances = CountingHook.instances
+        response = client.get('/hello')
+        assert response.status_code == 200
+        assert response.headers['Seen'] == 'hello_world'
+        assert CountingHook.instances == instances + 1
+
+    route, _ = app.router.lookup('/hello', 'GET')
+    plan = route.artifacts[app]
+    client.get('/hello')
+    assert route.artifacts[app] is plan
+    assert not app.injector.resolver_cache
+
+
+def test_error_pipeline_runs_hooks(app_class):
+    app = app_class(routes=routes, event_hooks=[CountingHook])
+    client = test.TestClient(app)
+    response = client.get('/missing')
+    assert response.status_code == 404
+    assert response.headers['Seen'] == ''
+
+
+class StaticHooks():
+    @staticmethod
+    def on_request(route: Route):
+        assert route.name == 'hello_world'
+
+    @classmethod
+    def on_response(cls, response: http.Response):
+        response.headers['Hook'] = cls.__name__
+
+
+def test_static_and_class_method_hooks(app_class):
+    app = app_class(routes=routes, event_hooks=[StaticHooks])
+    client = test.TestClient(app)
+    response = client.get('/hello')
+    assert response.status_code == 200
+    assert response.headers['Hook'] == 'StaticHooks'
+
+
+def test_get_event_hooks():
+    app = App(routes=routes, event_hooks=[CustomResponseHeader, StaticHooks])
+    on_request, on_response, on_error = app.get_event_hooks()
+    assert [hook.__name__ for hook in on_request] == ['on_request', 'on_request']
+    assert isinstance(on_request[0].__self__, CustomResponseHeader)
+    assert on_response[0].__self__ is StaticHooks
+    assert len(on_error) == 1
+
+
+@pytest.mark.parametrize('app_class', ['wsgi-compiled', 'asgi-compiled'], indirect=True)
+def test_compiled_on_error(app_class):
+    global ON_ERROR
+
+    ON_ERROR = None
+    client = test.TestClient(app_class(routes=routes, event_hooks=event_hooks))
+    with pytest.raises(AssertionError):
+        client.get('/error')
+    assert ON_ERROR == 'Ran on_error'
+
+
+def test_eager_resolution(app_class):
+    # Both `/hello` routes are named "hello_world", and both are resolved.
+    all_routes = routes + [Route('/hello', method='POST', handler=hello_world, documented=False)]
+    app = app_class(routes=all_routes, event_hooks=[CountingHook], eager=True)
+    assert set(app.resolution_times) == {
+        ('GET', '/hello'), ('POST', '/hello'), ('GET', '/error'),
+        ('GET', '/schema/'), ('GET', '/docs/'), ('GET', '/static/{+filename}')
+    }
+    assert all(seconds >= 0 for seconds in app.resolution_times.values())
+
+    route, _ = app.router.lookup('/hello', 'GET')
+    assert app in route.artifacts
+
+
+def test_eager_resolution_reports_misconfiguration():
+    class Unknown():
+        pass
+
+    def misconfigured(value: Unknown):
+        pass
+
+    app = App(routes=routes + [Route('/misconfigured', 'GET', misconfigured)])
+    with pytest.raises(ConfigurationError) as exc:
+        app.warmup()
+    assert str(exc.value).startswith('Could not resolve route "misconfigured" (GET /misconfigured).')
+
+
+class NotFoundHook(CountingHook):
+    handle_not_found = True
+
+
+@pytest.mark.parametrize('app_class', [App, ASyncApp])
+def test_prerendered_not_found(app_class):
+    app = app_class(routes=routes, event_hooks=[CountingHook], prerender_not_found=True)
+    client = test.TestClient(app)
+
+    instances = CountingHook.instances
+    response = client.get('/missing')
+    assert response.status_code == 404
+    assert response.json() == 'Not found'
+    assert response.headers['Content-Type'] == 'application/json'
+    assert 'Seen' not in response.headers
+
+    response = client.post('/hello')
+    assert response.status_code == 405
+    assert response.json() == 'Method not allowed'
+    assert CountingHook.instances == instances
+
+    response = client.get('/hello')
+    assert response.status_code == 200
+    assert response.headers['Seen'] == 'hello_world'
+
+
+@pytest.mark.parametrize('app_class', [App, ASyncApp])
+def test_prerendered_not_found_with_hooks_that_handle_not_found(app_class):
+    app = app_class(routes=routes, event_hooks=[NotFoundHook], prerender_not_found=True)
+    client = test.TestClient(app)
+    response = client.get('/missing')
+    assert response.status_code == 404
+    assert response.headers['Seen'] == ''
@@ -1,8 +1,16 @@
+import asyncio
+import io
+import sys
+import tempfile
+
 import pytest
 from pytest import param
 
-from apistar import Route, http, test
+from apistar import Route, exceptions, http, test, types, validators
 from apistar.server.app import App, ASyncApp
+from apistar.server.asgi import ASGIBodyStream
+from apistar.server.components import Component
+from apistar.server.wsgi import WSGIBodyStream
 
 # HTTP Components as parameters
 
@@ -129,12 +137,9 @@ routes = [
 ]
 
 
-@pytest.fixture(scope='module', params=['wsgi', 'asgi'])
-def client(request):
-    if request.param == 'asgi':
-        app = ASyncApp(routes=routes)
-    else:
-        app = App(routes=routes)
+@pytest.fixture(scope='module')
+def client(app_class):
+    app = app_class(routes=routes)
     return test.TestClient(app)
 
 
@@ -159,6 +164,10 @@ def test_method(client):
     assert response.json() == {'method': 'GET'}
     response = client.post('/method/')
     assert response.json() == {'method': 'POST'}
+    response = client.head('/method/')
+    assert response.status_code == 200
+    response = client.put('/method/')
+    assert response.status_code == 405
 
 
 def test_scheme(client):
@@ -387,6 +396,40 @@ def test_headers_type(client):
     assert [('B', '456'), ('a', '123')] == http.Headers({'a': '123', 'b': '456'})
 
 
+def test_wsgi_headers_type():
+    environ = {
+        'CONTENT_TYPE': 'application/json',
+        'HTTP_X_FOO': 'bar',
+        'HTTP_HOST': 'example.com',
+        'wsgi.url_scheme': 'http',
+    }
+    h = http.WSGIHeaders(environ)
+    assert h['content-type'] == 'application/json'
+    assert h['X-Foo'] == 'bar'
+    assert h.get('missing') is None
+    assert h.get_list('x-foo') == ['bar']
+    assert 'host' in h
+    assert 'content-length' not in h
+    assert h._items is None
+    with pytest.raises(KeyError):
+        h['missing']
+
+    assert dict(h) == {'content-type': 'application/json', 'x-foo': 'bar', 'host': 'example.com'}
+    assert h == http.Headers(dict(h))
+
+
+def test_asgi_headers_type():
+    h = http.ASGIHeaders([(b'host', b'example.com'), (b'Accept', b'text/html'), (b'accept', b'*/*')])
+    assert h['accept'] == 'text/html'
+    assert h.get_list('ACCEPT') == ['text/html', '*/*']
+    assert 'host' in h
+    assert 'missing' not in h
+    assert h._items is None
+
+    assert h.items() == [('host', 'example.com'), ('accept', 'text/html'), ('accept', '*/*')]
+    assert h == http.Headers(h.items())
+
+
 def test_queryparams_type(client):
     q = http.QueryParams([('a', '123'), ('a', '456'), ('b', '789')])
     assert 'a' in q
@@ -405,3 +448,379 @@ def test_queryparams_type(client):
     assert http.QueryParams({'a': '123', 'b': '456'}) == [('b', '456'), ('a', '123')]
     assert {'b': '456', 'a': '123'} == http.QueryParams({'a': '123', 'b': '456'})
     assert [('b', '456'), ('a', '123')] == http.QueryParams({'a': '123', 'b': '456'})
+
+
+def test_queryparams_from_query_string():
+    q = http.QueryParams('a=123&b=789&a=456&c=%20x')
+    assert q._items is None
+    assert q['a'] == '123'
+    assert q.get_list('a') == ['123', '456']
+    assert q.get_list('missing') == []
+    assert q.get('c') == ' x'
+    assert 'b' in q
+    assert q == [('a', '123'), ('b', '789'), ('a', '456'), ('c', ' x')]
+    assert http.QueryParams('') == http.QueryParams()
+
+
+def get_body_stream(stream: http.BodyStream):
+    chunks = list(stream)
+    return {'chunks': len(chunks), 'body': b''.join(chunks).decode('utf-8')}
+
+
+async def get_body_stream_async(stream: http.BodyStream):
+    chunks = []
+    async for chunk in stream:
+        chunks.append(chunk)
+    return {'chunks': len(chunks), 'body': b''.join(chunks).decode('utf-8')}
+
+
+def test_wsgi_body_stream():
+    app = App(routes=[Route('/', 'POST', get_body_stream)])
+    client = test.TestClient(app)
+    response = client.post('/', data='content')
+    assert response.json() == {'chunks': 1, 'body': 'content'}
+
+
+def test_asgi_body_stream():
+    app = ASyncApp(routes=[Route('/', 'POST', get_body_stream_async)])
+    client = test.TestClient(app)
+    response = client.post('/', data='content')
+    assert response.json() == {'chunks': 1, 'body': 'content'}
+
+
+def test_wsgi_body_stream_chunks():
+    stream = WSGIBodyStream(io.BytesIO(b'abcdefg'), chunk_size=3)
+    assert list(stream) == [b'abc', b'def', b'g']
+    assert list(stream) == []
+
+
+def test_asgi_body_stream_chunks():
+    messages = [
+        {'type': 'http.request', 'body': b'abc', 'more_body': True},
+        {'type': 'http.request', 'body': b'', 'more_body': True},
+        {'type': 'http.request', 'body': b'def'},
+    ]
+
+    async def receive():
+        return messages.pop(0)
+
+    async def consume(stream):
+        chunks = []
+        async for chunk in stream:
+            chunks.append(chunk)
+        return chunks
+
+    stream = ASGIBodyStream(receive)
+    loop = asyncio.get_event_loop()
+    assert loop.run_until_complete(consume(stream)) == [b'abc', b'def']
+    assert loop.run_until_complete(consume(stream)) == []
+
+
+def test_body_stream_max_size():
+    stream = WSGIBodyStream(io.BytesIO(b'abcdefg'), max_size=5, chunk_size=3)
+    assert next(stream) == b'abc'
+    with pytest.raises(exceptions.RequestEntityTooLarge):
+        next(stream)
+
+    stream = http.BodyStream(max_size=5)
+    stream.check_content_length('5')
+    stream.check_content_length('invalid')
+    with pytest.raises(exceptions.RequestEntityTooLarge):
+        stream.check_content_length('6')
+
+
+def test_max_body_size(app_class):
+    app = app_class(routes=routes, max_body_size=10)
+    client = test.TestClient(app)
+
+    response = client.post('/body/', data='0123456789')
+    assert response.status_code == 200
+    assert response.json() == {'body': '0123456789'}
+
+    response = client.post('/body/', data='0123456789a')
+    assert response.status_code == 413
+    assert response.json() == 'Request body too large'
+
+
+def get_body_file(body_file: http.BodyFile, data: http.RequestData, body: http.Body):
+    return {
+        'spooled': body_file._rolled,
+        'data': {key: value for key, value in data.items() if not hasattr(value, 'filename')},
+        'files': {key: value.read().decode('utf-8') for key, value in data.items() if hasattr(value, 'filename')},
+        'length': len(body),
+    }
+
+
+def test_body_spool_size(app_class):
+    app = app_class(routes=[Route('/', 'POST', get_body_file)], body_spool_size=1024)
+    client = test.TestClient(app)
+
+    response = client.post('/', files={'a': ('b', '123')}, data={'b': '42'})
+    assert response.status_code == 200
+    data = response.json()
+    assert not data['spooled']
+    assert data['data'] == {'b': '42'}
+    assert data['files'] == {'a': '123'}
+
+    response = client.post('/', files={'a': ('b', 'x' * 2048)}, data={'b': '42'})
+    assert response.status_code == 200
+    data = response.json()
+    assert data['spooled']
+    assert data['data'] == {'b': '42'}
+    assert data['files'] == {'a': 'x' * 2048}
+    assert data['length'] > 2048
+
+
+def test_body_not_spooled(app_class, monkeypatch):
+    spooled = []
+
+    class SpooledTemporaryFile(tempfile.SpooledTemporaryFile):
+        def __init__(self, *args, **kwargs):
+            spooled.append(self)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(tempfile, 'SpooledTemporaryFile', SpooledTemporaryFile)
+    app = app_class(routes=[
+        Route('/body/', 'POST', get_body),
+        Route('/request/', 'POST', get_request),
+        Route('/body_file/', 'POST', get_body_file),
+    ])
+    client = test.TestClient(app)
+
+    response = client.post('/body/', data='abc')
+    assert response.json() == {'body': 'abc'}
+    response = client.post('/request/', data='abc')
+    assert response.json()['body'] == 'abc'
+    assert spooled == []
+
+    response = client.post('/body_file/', data={'b': '42'})
+    assert response.json()['data'] == {'b': '42'}
+    assert response.json()['length'] == 4
+    assert len(spooled) == 1
+
+
+body_files = []
+
+
+def keep_body_file(body_file: http.BodyFile):
+    body_files.append(body_file)
+    return {'closed': body_file.closed}
+
+
+def test_body_file_closed(app_class):
+    app = app_class(routes=[Route('/', 'POST', keep_body_file)])
+    client = test.TestClient(app)
+    del body_files[:]
+
+    response = client.post('/', data='abc')
+    assert response.json() == {'closed': False}
+    assert [body_file.closed for body_file in body_files] == [True]
+
+
+def stream_generator():
+    yield 'Hello, '
+    yield b'world'
+
+
+def stream_response():
+    return http.StreamingResponse(iter([b'a', b'b', b'c']), headers={'Content-Type': 'text/plain'})
+
+
+def test_streaming_response(app_class):
+    app = app_class(routes=[
+        Route('/generator/', 'GET', stream_generator),
+        Route('/response/', 'GET', stream_response),
+    ])
+    client = test.TestClient(app)
+
+    response = client.get('/generator/')
+    assert response.status_code == 200
+    assert response.text == 'Hello, world'
+    assert 'Content-Length' not in response.headers
+
+    response = client.get('/response/')
+    assert response.status_code == 200
+    assert response.text == 'abc'
+    assert response.headers['Content-Type'] == 'text/plain'
+
+
+def test_wsgi_streaming_response_is_iterated():
+    app = App(routes=[Route('/', 'GET', stream_generator)])
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'wsgi.url_scheme': 'http',
+        'SCRIPT_NAME': '',
+        'PATH_INFO': '/',
+        'SERVER_NAME': 'testserver',
+        'SERVER_PORT': '80',
+        'wsgi.input': io.BytesIO(),
+    }
+    content = app(environ, lambda status, headers, exc_info=None: None)
+    assert list(content) == [b'Hello, ', b'world']
+    content.close()
+
+
+def test_asgi_streaming_response_messages():
+    app = ASyncApp(routes=[Route('/', 'GET', stream_generator)])
+    scope = {
+        'type': 'http',
+        'method': 'GET',
+        'path': '/',
+        'scheme': 'http',
+        'query_string': b'',
+        'headers': [],
+        'server': ['testserver', 80],
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request'}
+
+    async def send(message):
+        messages.append(message)
+
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(app(scope)(receive, send))
+    assert [message.get('body') for message in messages[1:]] == [b'Hello, ', b'world', b'']
+    assert [message.get('more_body', False) for message in messages[1:]] == [True, True, False]
+
+
+class Cursor(list):
+    pass
+
+
+cursor_events = []
+
+
+class CursorComponent(Component):
+    def resolve(self) -> Cursor:
+        cursor_events.append('open')
+        yield Cursor(['a', 'b'])
+        cursor_events.append('close')
+
+
+def stream_cursor(cursor: Cursor):
+    for row in cursor:
+        cursor_events.append(row)
+        yield row
+
+
+@pytest.mark.parametrize('app_class', [App, ASyncApp])
+def test_streaming_response_teardown(app_class):
+    app = app_class(routes=[Route('/', 'GET', stream_cursor)], components=[CursorComponent()])
+    client = test.TestClient(app)
+    del cursor_events[:]
+    response = client.get('/')
+    assert response.text == 'ab'
+    assert cursor_events == ['open', 'a', 'b', 'close']
+
+
+@pytest.mark.skipif(sys.version_info < (3, 6), reason='Async generators require Python 3.6')
+@pytest.mark.parametrize('app_class', ['asgi', 'asgi-compiled'], indirect=True)
+def test_async_streaming_response(app_class):
+    namespace = {}
+    exec(
+        'async def stream_async_generator():\n'
+        '    yield "Hello, "\n'
+        '    yield b"world"\n',
+        namespace
+    )
+    app = app_class(routes=[Route('/', 'GET', namespace['stream_async_generator'])])
+    client = test.TestClient(app)
+    response = client.get('/')
+    assert response.status_code == 200
+    assert response.text == 'Hello, world'
+
+
+@pytest.mark.skipif(sys.version_info < (3, 6), reason='Async generators require Python 3.6')
+@pytest.mark.parametrize('app_class', ['wsgi', 'wsgi-compiled'], indirect=True)
+def test_async_streaming_response_requires_async_app(app_class):
+    namespace = {}
+    exec(
+        'async def stream_async_generator():\n'
+        '    yield "Hello, "\n',
+        namespace
+    )
+    app = app_class(routes=[Route('/', 'GET', namespace['stream_async_generator'])])
+    client = test.TestClient(app)
+    with pytest.raises(exceptions.ConfigurationError):
+        client.get('/')
+
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'wsgi.url_scheme': 'http',
+        'SCRIPT_NAME': '',
+        'PATH_INFO': '/',
+        'SERVER_NAME': 'testserver',
+        'SERVER_PORT': '80',
+        'wsgi.input': io.BytesIO(),
+    }
+    statuses = []
+    content = app(environ, lambda status, headers, exc_info=None: statuses.append(status))
+    assert statuses == ['500 Internal Server Error']
+    assert list(content) == [b'"Server error"']
+
+
+class Product(types.Type):
+    name = validators.String()
+    rating = validators.Integer()
+
+
+def list_products(count: http.QueryParam):
+    return (Product(name='product %d' % index, rating=index) for index in range(int(count)))
+
+
+def ndjson_products(count: http.QueryParam):
+    return http.NDJSONResponse(list_products(count))
+
+
+def json_array_products(count: http.QueryParam):
+    return http.JSONArrayResponse(list_products(count))
+
+
+def test_ndjson_response(app_class):
+    app = app_class(routes=[Route('/', 'GET', ndjson_products)])
+    client = test.TestClient(app)
+
+    response = client.get('/?count=2')
+    assert response.status_code == 200
+    assert response.headers['Content-Type'] == 'application/x-ndjson'
+    assert response.content == b'{"name":"product 0","rating":0}\n{"name":"product 1","rating":1}\n'
+
+    response = client.get('/?count=0')
+    assert response.content == b''
+
+
+def test_json_array_response(app_class):
+    app = app_class(routes=[Route('/', 'GET', json_array_products)])
+    client = test.TestClient(app)
+
+    response = client.get('/?count=3')
+    assert response.status_code == 200
+    assert response.headers['Content-Type'] == 'application/json'
+    assert response.json() == [
+        {'name': 'product 0', 'rating': 0},
+        {'name': 'product 1', 'rating': 1},
+        {'name': 'product 2', 'rating': 2},
+    ]
+
+    response = client.get('/?count=0')
+    assert response.json() == []
+
+
+@pytest.mark.skipif(sys.version_info < (3, 6), reason='Async generators require Python 3.6')
+def test_async_json_array_response():
+    namespace = {'http': http}
+    exec(
+        'async def stream_items():\n'
+        '    for index in range(3):\n'
+        '        yield {"index": index}\n'
+        '\n'
+        'def json_array():\n'
+        '    return http.JSONArrayResponse(stream_items())\n',
+        namespace
+    )
+    app = ASyncApp(routes=[Route('/', 'GET', namespace['json_array'])])
+    client = test.TestClient(app)
+    response = client.get('/')
+    assert response.json() == [{'index': 0}, {'index': 1}, {'index': 2}]
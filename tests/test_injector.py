@@ -0,0 +1,432 @@
+import asyncio
+import sys
+import threading
+
+import pytest
+
+from apistar import ASyncApp, Route, http
+from apistar.exceptions import ConfigurationError
+from apistar.server.asgi import ASGIScope, ASGISend
+from apistar.server.components import Component, ReturnValue
+from apistar.server.injector import (
+    ASyncInjector, CompiledASyncInjector, CompiledInjector, Injector,
+    ThreadedFunction
+)
+from apistar.server.threadpool import ThreadPool
+from apistar.server.wsgi import WSGIStartResponse
+from apistar.test import TestClient
+
+
+class Counter():
+    def __init__(self, value):
+        self.value = value
+
+
+class CounterComponent(Component):
+    def resolve(self, start: int) -> Counter:
+        return Counter(start)
+
+
+class Doubled(int):
+    pass
+
+
+class DoubledComponent(Component):
+    def resolve(self, counter: Counter) -> Doubled:
+        return Doubled(counter.value * 2)
+
+
+def add_one(doubled: Doubled) -> int:
+    return doubled + 1
+
+
+def stringify(value: ReturnValue, counter: Counter) -> str:
+    return '%d/%d' % (value, counter.value)
+
+
+async def async_add_one(doubled: Doubled) -> int:
+    return doubled + 1
+
+
+components = [CounterComponent(), DoubledComponent()]
+initial = {'start': int}
+
+
+def run_async(coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+
+@pytest.mark.parametrize('injector_class', [Injector, CompiledInjector])
+def test_run(injector_class):
+    injector = injector_class(components, initial)
+    assert injector.run([add_one, stringify], {'start': 3}) == '7/3'
+    assert injector.run([add_one, stringify], {'start': 4}) == '9/4'
+    assert len(injector.resolver_cache) == 1
+
+
+@pytest.mark.parametrize('injector_class', [ASyncInjector, CompiledASyncInjector])
+def test_run_async(injector_class):
+    injector = injector_class(components, initial)
+    assert run_async(injector.run_async([async_add_one, stringify], {'start': 3})) == '7/3'
+
+
+def test_compiled_injector_rejects_async_functions():
+    injector = CompiledInjector(components, initial)
+    with pytest.raises(ConfigurationError):
+        injector.resolve_plan([async_add_one])
+
+
+@pytest.mark.parametrize('injector_class', [Injector, CompiledInjector])
+def test_initial_outputs_are_written_to_state(injector_class):
+    injector = injector_class(components, initial)
+    state = {'start': 1}
+    assert injector.run([add_one], state) == 3
+    assert state['start'] == 3
+
+
+def test_dump_plan():
+    injector = CompiledInjector(components, initial)
+    plan = injector.resolve_plan([add_one, stringify])
+    source = injector.dump_plan(plan)
+    assert "start_0 = state['start']" in source
+    assert 'CounterComponent.resolve' in source
+    assert 'stringify' in source
+    assert plan.steps == injector.resolve_functions([add_one, stringify])
+
+
+class Database(str):
+    pass
+
+
+class Cache(str):
+    pass
+
+
+class Session(str):
+    pass
+
+
+events = []
+
+
+class DatabaseComponent(Component):
+    async def resolve(self) -> Database:
+        events.append('database:start')
+        await asyncio.sleep(0.01)
+        events.append('database:end')
+        return Database('db')
+
+
+class CacheComponent(Component):
+    async def resolve(self) -> Cache:
+        events.append('cache:start')
+        await asyncio.sleep(0)
+        events.append('cache:end')
+        return Cache('cache')
+
+
+class SessionComponent(Component):
+    async def resolve(self, cache: Cache) -> Session:
+        events.append('session')
+        return Session('session:' + cache)
+
+
+class FailingCacheComponent(Component):
+    async def resolve(self) -> Cache:
+        raise ValueError()
+
+
+async def fan_out(database: Database, session: Session) -> str:
+    return '%s,%s' % (database, session)
+
+
+@pytest.mark.parametrize('injector_class', [ASyncInjector, CompiledASyncInjector])
+def test_independent_async_components_run_concurrently(injector_class):
+    injector = injector_class([DatabaseComponent(), CacheComponent(), SessionComponent()], {})
+    del events[:]
+    assert run_async(injector.run_async([fan_out], {})) == 'db,session:cache'
+    assert events == ['database:start', 'cache:start', 'cache:end', 'database:end', 'session']
+
+
+def test_schedule_steps():
+    injector = ASyncInjector([DatabaseComponent(), CacheComponent(), SessionComponent()], {})
+    stages = injector.resolve_stages([fan_out])
+    names = [[step[0].__qualname__ for step in stage] for stage in stages]
+    assert names == [
+        ['DatabaseComponent.resolve', 'CacheComponent.resolve'],
+        ['SessionComponent.resolve'],
+        ['fan_out'],
+    ]
+
+
+@pytest.mark.parametrize('injector_class', [ASyncInjector, CompiledASyncInjector])
+def test_concurrent_failure_cancels_other_components(injector_class):
+    injector = injector_class([DatabaseComponent(), FailingCacheComponent(), SessionComponent()], {})
+    del events[:]
+    with pytest.raises(ValueError):
+        run_async(injector.run_async([fan_out], {}))
+    run_async(asyncio.sleep(0.02))
+    assert events == ['database:start']
+
+
+class Settings(dict):
+    pass
+
+
+class Pool():
+    def __init__(self, settings):
+        self.settings = settings
+
+
+class SettingsComponent(Component):
+    scope = 'app'
+    instances = 0
+
+    def resolve(self) -> Settings:
+        SettingsComponent.instances += 1
+        return Settings(size=10)
+
+
+class PoolComponent(Component):
+    scope = 'app'
+
+    def resolve(self, settings: Settings) -> Pool:
+        return Pool(settings)
+
+
+class RequestPoolComponent(Component):
+    scope = 'app'
+
+    def resolve(self, start: int) -> Pool:
+        return Pool(start)
+
+
+def use_pool(pool: Pool, counter: Counter) -> int:
+    return pool.settings['size'] + counter.value
+
+
+@pytest.mark.parametrize('injector_class', [Injector, CompiledInjector])
+def test_app_scoped_components(injector_class):
+    injector = injector_class([SettingsComponent(), PoolComponent()] + components, initial)
+    instances = SettingsComponent.instances
+
+    assert injector.run([use_pool], {'start': 1}) == 11
+    assert injector.run([use_pool], {'start': 2}) == 12
+    assert injector.run([use_pool, stringify], {'start': 3}) == '13/3'
+    assert SettingsComponent.instances == instances + 1
+
+    steps = injector.resolve_functions([use_pool])
+    assert [step[0] for step in steps] == [components[0].resolve, use_pool]
+    assert steps[-1][3] == {'pool': injector.app_values['pool']}
+
+
+def test_app_scoped_component_may_not_depend_on_request():
+    injector = Injector([RequestPoolComponent()] + components, initial)
+    with pytest.raises(ConfigurationError):
+        injector.resolve_plan([use_pool])
+
+
+class Connection():
+    def __init__(self):
+        self.closed = False
+
+
+class ConnectionComponent(Component):
+    def resolve(self) -> Connection:
+        connection = Connection()
+        events.append('checkout')
+        yield connection
+        connection.closed = True
+        events.append('release')
+
+
+def use_connection(connection: Connection) -> Connection:
+    events.append('handler')
+    return connection
+
+
+def fail_with_connection(connection: Connection):
+    events.append('handler')
+    raise ValueError()
+
+
+@pytest.mark.parametrize('injector_class', [Injector, CompiledInjector])
+def test_generator_components(injector_class):
+    injector = injector_class([ConnectionComponent()], {})
+    del events[:]
+    connection = injector.run([use_connection], {})
+    assert connection.closed
+    assert events == ['checkout', 'handler', 'release']
+
+    del events[:]
+    with pytest.raises(ValueError):
+        injector.run([fail_with_connection], {})
+    assert events == ['checkout', 'handler', 'release']
+
+
+def test_app_scoped_component_may_not_be_generator():
+    class AppConnectionComponent(ConnectionComponent):
+        scope = 'app'
+
+    injector = Injector([AppConnectionComponent()], {})
+    with pytest.raises(ConfigurationError):
+        injector.resolve_plan([use_connection])
+
+
+def test_generator_components_teardown_after_response(app_class):
+    def get_connection(connection: Connection):
+        events.append('handler')
+        return {'closed': connection.closed}
+
+    class RecordFinalize(app_class):
+        def finalize_wsgi(self, response: http.Response, start_response: WSGIStartResponse):
+            events.append('finalize')
+            return super().finalize_wsgi(response, start_response)
+
+        async def finalize_asgi(self, response: http.Response, send: ASGISend, scope: ASGIScope):
+            events.append('finalize')
+            return await super().finalize_asgi(response, send, scope)
+
+    routes = [
+        Route('/connection/', 'GET', get_connection),
+        Route('/error/', 'GET', fail_with_connection),
+    ]
+    app = RecordFinalize(routes=routes, components=[ConnectionComponent()])
+    client = TestClient(app)
+
+    del events[:]
+    response = client.get('/connection/')
+    assert response.json() == {'closed': False}
+    assert events == ['checkout', 'handler', 'finalize', 'release']
+
+    del events[:]
+    with pytest.raises(ValueError):
+        client.get('/error/')
+    assert events == ['checkout', 'handler', 'finalize', 'release']
+
+
+class FailingConnectionComponent(Component):
+    def resolve(self) -> Connection:
+        yield Connection()
+        raise ValueError('Could not release connection.')
+
+
+def get_connection_closed(connection: Connection):
+    return {'closed': connection.closed}
+
+
+def stream_with_connection(connection: Connection):
+    yield 'a'
+    yield 'b'
+
+
+def test_teardown_errors_do_not_replace_response(app_class, caplog):
+    routes = [
+        Route('/connection/', 'GET', get_connection_closed),
+        Route('/stream/', 'GET', stream_with_connection),
+    ]
+    app = app_class(routes=routes, components=[FailingConnectionComponent()])
+    client = TestClient(app)
+
+    response = client.get('/connection/')
+    assert response.status_code == 200
+    assert response.json() == {'closed': False}
+
+    response = client.get('/stream/')
+    assert response.status_code == 200
+    assert response.text == 'ab'
+
+    messages = [record for record in caplog.records if record.name == 'apistar']
+    assert len(messages) == 2
+    assert all(record.exc_info[0] is ValueError for record in messages)
+
+
+@pytest.mark.skipif(sys.version_info < (3, 6), reason='Async generators require Python 3.6')
+def test_async_generator_components():
+    namespace = {'Connection': Connection, 'events': events}
+    exec(
+        'async def resolve(self) -> Connection:\n'
+        '    events.append("checkout")\n'
+        '    yield Connection()\n'
+        '    events.append("release")\n',
+        namespace
+    )
+    component = type('AsyncConnectionComponent', (Component,), {'resolve': namespace['resolve']})()
+
+    for injector_class in (ASyncInjector, CompiledASyncInjector):
+        injector = injector_class([component], {})
+        del events[:]
+        run_async(injector.run_async([use_connection], {}))
+        assert events == ['checkout', 'handler', 'release']
+
+
+class ThreadName(str):
+    pass
+
+
+class ThreadNameComponent(Component):
+    def resolve(self) -> ThreadName:
+        return ThreadName(threading.current_thread().name)
+
+
+class LoopThreadNameComponent(ThreadNameComponent):
+    run_in_thread = False
+
+
+def get_thread_names(component_thread: ThreadName):
+    return {'handler': threading.current_thread().name, 'component': component_thread}
+
+
+@pytest.mark.parametrize('app_class', ['asgi', 'asgi-compiled'], indirect=True)
+@pytest.mark.parametrize('component,route_run_in_thread,expected', [
+    (ThreadNameComponent(), None, {'handler': True, 'component': True}),
+    (ThreadNameComponent(), False, {'handler': False, 'component': True}),
+    (LoopThreadNameComponent(), None, {'handler': True, 'component': False}),
+])
+def test_run_in_thread(app_class, component, route_run_in_thread, expected):
+    routes = [Route('/', 'GET', get_thread_names, run_in_thread=route_run_in_thread)]
+    app = app_class(routes=routes, components=[component], run_in_thread=True, max_threads=2)
+    client = TestClient(app)
+    response = client.get('/')
+    main_thread = threading.current_thread().name
+    assert {key: name != main_thread for key, name in response.json().items()} == expected
+    assert app.thread_pool.metrics() == {'max_workers': 2, 'queued': 0, 'running': 0}
+
+
+def read_request(method: http.Method, query_params: http.QueryParams, data: http.RequestData):
+    pass
+
+
+@pytest.mark.parametrize('app_class', ['asgi', 'asgi-compiled'], indirect=True)
+def test_builtin_components_run_on_event_loop(app_class):
+    app = app_class(routes=[], run_in_thread=True)
+    steps = app.injector.resolve_function(read_request)
+    assert [step[0].__name__ for step in steps if isinstance(step[0], ThreadedFunction)] == []
+
+
+def test_run_in_thread_is_off_by_default():
+    app = ASyncApp(routes=[Route('/', 'GET', get_thread_names)], components=[ThreadNameComponent()])
+    client = TestClient(app)
+    main_thread = threading.current_thread().name
+    assert client.get('/').json() == {'handler': main_thread, 'component': main_thread}
+
+
+def test_thread_pool_metrics():
+    pool = ThreadPool(max_workers=1)
+    started = threading.Event()
+    release = threading.Event()
+
+    def block():
+        started.set()
+        release.wait()
+
+    async def check():
+        tasks = [asyncio.ensure_future(pool.run(block, {})) for _ in range(2)]
+        await asyncio.get_event_loop().run_in_executor(None, started.wait)
+        assert pool.metrics() == {'max_workers': 1, 'queued': 1, 'running': 1}
+        release.set()
+        await asyncio.gather(*tasks)
+        assert pool.metrics() == {'max_workers': 1, 'queued': 0, 'running': 0}
+
+    run_async(check())
+    pool.shutdown()
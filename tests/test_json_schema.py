@@ -4,6 +4,7 @@ import os
 import pytest
 
 from apistar.codecs import JSONSchemaCodec
+from apistar.exceptions import ValidationError
 
 filenames = [
     'additionalItems.json',
@@ -68,3 +69,15 @@ def test_json_schema(schema, value, is_valid, description):
     validator = JSONSchemaCodec().decode_from_data_structure(schema)
     was_valid = validator.is_valid(value)
     assert was_valid == is_valid, description
+
+
+@pytest.mark.parametrize("schema,value,is_valid,description", test_cases)
+def test_json_schema_compiled(schema, value, is_valid, description):
+    validator = JSONSchemaCodec().decode_from_data_structure(schema)
+    try:
+        validator.compile()(value)
+    except ValidationError:
+        was_valid = False
+    else:
+        was_valid = True
+    assert was_valid == is_valid, description
@@ -0,0 +1,141 @@
+import collections
+
+import pytest
+
+from apistar import exceptions, http, jsonbackends, types, validators
+
+
+class Product(types.Type):
+    name = validators.String()
+    rating = validators.Integer()
+
+
+def default(obj):
+    if isinstance(obj, types.Type):
+        return dict(obj)
+    raise TypeError()
+
+
+@pytest.mark.parametrize('backend', list(jsonbackends.BACKENDS.values()), ids=list(jsonbackends.BACKENDS))
+def test_backend(backend):
+    data = {'name': 'café', 'items': [1, 2.5, None, True], 'product': Product(name='a', rating=1)}
+    content = backend.dumps(data, default=default)
+    assert isinstance(content, bytes)
+    assert backend.loads(content) == {
+        'name': 'café', 'items': [1, 2.5, None, True], 'product': {'name': 'a', 'rating': 1}
+    }
+    assert backend.loads(content.decode('utf-8'))['name'] == 'café'
+    assert backend.loads(backend.dumps(data, default=default, indent=True))['name'] == 'café'
+
+
+@pytest.mark.parametrize('backend', list(jsonbackends.BACKENDS.values()), ids=list(jsonbackends.BACKENDS))
+def test_backend_non_string_keys(backend):
+    # Validation errors for arrays are keyed by the integer index.
+    content = backend.dumps({'items': {0: 'Must be a string.', 2: {'a': 'Required.'}}})
+    assert backend.loads(content) == {'items': {'0': 'Must be a string.', '2': {'a': 'Required.'}}}
+
+
+@pytest.mark.parametrize('backend', list(jsonbackends.BACKENDS.values()), ids=list(jsonbackends.BACKENDS))
+def test_backend_non_finite_floats(backend):
+    data = {'a': None, 'b': [float('inf'), -float('inf'), 1.5], 'c': 'NaN'}
+    for value in (data, float('nan'), [Product(name='a', rating=1), {'d': float('nan')}]):
+        with pytest.raises(ValueError):
+            backend.dumps(value, default=default)
+        with pytest.raises(ValueError):
+            backend.dumps(value, default=default, indent=True)
+
+    expected = {'a': None, 'b': [None, None, 1.5], 'c': 'NaN'}
+    assert backend.loads(backend.dumps(data, allow_nan=True)) == expected
+    assert backend.loads(backend.dumps(data, indent=True, allow_nan=True)) == expected
+    assert backend.loads(backend.dumps(float('nan'), allow_nan=True)) is None
+
+    content = backend.dumps([Product(name='a', rating=1), {'d': float('nan')}], default=default, allow_nan=True)
+    assert backend.loads(content) == [{'name': 'a', 'rating': 1}, {'d': None}]
+
+    # Output that contains `null` without any non-finite floats is fine.
+    assert backend.loads(backend.dumps({'a': None, 'b': 1.5})) == {'a': None, 'b': 1.5}
+
+
+@pytest.mark.parametrize('backend', list(jsonbackends.BACKENDS.values()), ids=list(jsonbackends.BACKENDS))
+def test_backend_indent(backend):
+    content = backend.dumps({'a': [1]}, indent=True)
+    assert b'\n    "a"' in content
+    assert b'\n        1' in content
+
+
+def test_set_allow_nan():
+    with pytest.raises(ValueError):
+        http.JSONResponse({'a': float('nan')})
+
+    jsonbackends.set_backend(allow_nan=True)
+    try:
+        assert http.JSONResponse({'a': float('nan')}).content == b'{"a":null}'
+        assert jsonbackends.dumps([float('inf')]) == b'[null]'
+        with pytest.raises(ValueError):
+            jsonbackends.dumps([float('inf')], allow_nan=False)
+    finally:
+        jsonbackends.set_backend(allow_nan=False)
+
+
+def test_stdlib_backend():
+    content = jsonbackends.stdlib.dumps({'a': 'é', 'b': [1, 2]})
+    assert content == '{"a":"é","b":[1,2]}'.encode('utf-8')
+    content = jsonbackends.stdlib.dumps({'a': 1}, indent=True)
+    assert content == b'{\n    "a": 1\n}'
+
+
+def test_ordered_loads():
+    data = jsonbackends.loads(b'{"b": 1, "a": {"d": 2, "c": 3}}', ordered=True)
+    assert isinstance(data, collections.OrderedDict)
+    assert isinstance(data['a'], collections.OrderedDict)
+    assert list(data) == ['b', 'a']
+
+    data = jsonbackends.loads(b'{"b": 1}', ordered=False)
+    assert not isinstance(data, collections.OrderedDict)
+
+
+def test_unknown_backend():
+    with pytest.raises(exceptions.ConfigurationError):
+        jsonbackends.get_backend('missing')
+    with pytest.raises(exceptions.ConfigurationError):
+        jsonbackends.set_backend('missing')
+
+
+class UpperCaseBackend(jsonbackends.StandardLibraryBackend):
+    name = 'uppercase'
+
+    def encode(self, data, default, indent, allow_nan):
+        return super().encode(data, default, indent, allow_nan).upper()
+
+
+class UpperCaseResponse(http.JSONResponse):
+    backend = 'uppercase'
+
+
+def test_register_backend():
+    jsonbackends.register_backend(UpperCaseBackend())
+    try:
+        assert jsonbackends.get_backend('uppercase').dumps({'a': 'b'}) == b'{"A":"B"}'
+        assert UpperCaseResponse({'a': 'b'}).content == b'{"A":"B"}'
+        assert http.JSONResponse({'a': 'b'}).content == b'{"a":"b"}'
+
+        default_backend = jsonbackends.get_backend()
+        jsonbackends.set_backend('uppercase')
+        try:
+            assert jsonbackends.dumps({'a': 'b'}) == b'{"A":"B"}'
+        finally:
+            jsonbackends.set_backend(default_backend.name)
+    finally:
+        del jsonbackends.BACKENDS['uppercase']
+
+
+def test_response_default_hook():
+    response = http.JSONResponse([Product(name='a', rating=1)])
+    assert response.content == b'[{"name":"a","rating":1}]'
+    with pytest.raises(TypeError):
+        http.JSONResponse({'a': object()})
+
+
+def test_response_validation_errors():
+    response = http.JSONResponse({'items': {1: 'Must be a number.'}}, status_code=400)
+    assert response.content == b'{"items":{"1":"Must be a number."}}'
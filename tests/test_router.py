@@ -0,0 +1,207 @@
+import pytest
+
+from apistar import Include, Route, exceptions
+from apistar.server.cache import LRUCache, SegmentedLRUCache
+from apistar.server.router import Router
+
+
+def handler():
+    pass
+
+
+def get_user(user_id: int):
+    pass
+
+
+def get_price(price: float):
+    pass
+
+
+def get_item(user_id: int, slug: str):
+    pass
+
+
+def get_file(filename: str):
+    pass
+
+
+routes = [
+    Route('/', 'GET', handler, name='home'),
+    Route('/users/', 'GET', handler, name='list_users'),
+    Route('/users/', 'POST', handler, name='create_user'),
+    Route('/users/me', 'GET', handler, name='current_user'),
+    Route('/users/{user_id}', 'GET', get_user),
+    Route('/users/{user_id}/items/{slug}', 'GET', get_item),
+    Route('/prices/{price}', 'GET', get_price),
+    Route('/names/{slug}', 'GET', get_item, name='get_name'),
+    Route('/files/{+filename}', 'GET', get_file),
+    Route('/files/{+filename}/raw', 'GET', get_file, name='get_raw_file'),
+    Route('/docs/{slug}.json', 'GET', get_item, name='get_doc'),
+    Include('/api', 'api', [
+        Route('/users/{user_id}/', 'GET', get_user),
+    ]),
+]
+
+router = Router(routes)
+
+
+@pytest.mark.parametrize('path,method,name,params', [
+    ('/', 'GET', 'home', {}),
+    ('/users/', 'GET', 'list_users', {}),
+    ('/users/', 'POST', 'create_user', {}),
+    ('/users/me', 'GET', 'current_user', {}),
+    ('/users/123', 'GET', 'get_user', {'user_id': 123}),
+    ('/users/123/items/abc', 'GET', 'get_item', {'user_id': 123, 'slug': 'abc'}),
+    ('/prices/1.5', 'GET', 'get_price', {'price': 1.5}),
+    ('/names/a b', 'GET', 'get_name', {'slug': 'a b'}),
+    ('/files/a/b/c.txt', 'GET', 'get_file', {'filename': 'a/b/c.txt'}),
+    ('/files/a/b/raw', 'GET', 'get_raw_file', {'filename': 'a/b'}),
+    ('/docs/intro.json', 'GET', 'get_doc', {'slug': 'intro'}),
+    ('/api/users/1/', 'GET', 'api:get_user', {'user_id': 1}),
+    ('/', 'HEAD', 'home', {}),
+    ('/users/123', 'HEAD', 'get_user', {'user_id': 123}),
+    ('/files/a/b/raw', 'HEAD', 'get_raw_file', {'filename': 'a/b'}),
+])
+def test_lookup(path, method, name, params):
+    route, path_params = router.lookup(path, method)
+    assert router.name_lookups[name] is route
+    assert path_params == params
+
+
+@pytest.mark.parametrize('path,method,exc_class', [
+    ('/missing', 'GET', exceptions.NotFound),
+    ('/users/abc', 'GET', exceptions.NotFound),
+    ('/prices/1', 'GET', exceptions.NotFound),
+    ('/files/', 'GET', exceptions.NotFound),
+    ('/docs/.json', 'GET', exceptions.NotFound),
+    ('/users/me', 'POST', exceptions.MethodNotAllowed),
+    ('/users/123', 'DELETE', exceptions.MethodNotAllowed),
+    ('/users', 'DELETE', exceptions.MethodNotAllowed),
+    ('/users/', 'PUT', exceptions.MethodNotAllowed),
+])
+def test_lookup_failures(path, method, exc_class):
+    with pytest.raises(exc_class):
+        router.lookup(path, method)
+
+
+@pytest.mark.parametrize('path,location', [
+    ('/users', '/users/'),
+    ('/api/users/1', '/api/users/1/'),
+    ('', '/'),
+])
+def test_lookup_redirects(path, location):
+    with pytest.raises(exceptions.Found) as exc:
+        router.lookup(path, 'GET')
+    assert exc.value.location == location
+
+
+def test_lookup_explicit_head_route():
+    router = Router([
+        Route('/', 'HEAD', handler, name='head_home'),
+        Route('/', 'GET', handler, name='home'),
+        Route('/items/', 'POST', handler, name='create_item'),
+    ])
+    route, path_params = router.lookup('/', 'HEAD')
+    assert route is router.name_lookups['head_home']
+    route, path_params = router.lookup('/', 'GET')
+    assert route is router.name_lookups['home']
+    with pytest.raises(exceptions.MethodNotAllowed):
+        router.lookup('/items/', 'HEAD')
+
+
+@pytest.mark.parametrize('name,params,url', [
+    ('home', {}, '/'),
+    ('get_user', {'user_id': 123}, '/users/123'),
+    ('get_item', {'user_id': 1, 'slug': 'a b'}, '/users/1/items/a%20b'),
+    ('get_file', {'filename': 'a/b c.txt'}, '/files/a/b%20c.txt'),
+    ('get_doc', {'slug': 'intro'}, '/docs/intro.json'),
+    ('api:get_user', {'user_id': 1}, '/api/users/1/'),
+    ('list_users', {'page': 2}, '/users/?page=2'),
+    ('get_user', {'user_id': 1, 'page': None}, '/users/1'),
+    ('get_user', {'user_id': '1'}, '/users/1'),
+])
+def test_reverse_url(name, params, url):
+    assert router.reverse_url(name, **params) == url
+
+
+def test_reverse_url_failures():
+    with pytest.raises(exceptions.NoReverseMatch):
+        router.reverse_url('missing')
+    with pytest.raises(exceptions.NoReverseMatch):
+        router.reverse_url('get_user')
+    with pytest.raises(exceptions.NoReverseMatch):
+        router.reverse_url('get_user', user_id=None)
+    with pytest.raises(exceptions.NoReverseMatch):
+        router.reverse_url('get_user', page=1)
+
+
+def test_reverse_url_duplicate_names():
+    router = Router([
+        Route('/a/', 'GET', handler, name='dup'),
+        Route('/b/', 'GET', handler, name='dup'),
+    ])
+    assert router.reverse_url('dup') == '/a/'
+    assert router.name_lookups['dup'] is router.lookup('/a/', 'GET')[0]
+    assert router.lookup('/b/', 'GET')[0].url == '/b/'
+
+
+def test_url_builder_source():
+    source = router.reverse_lookups['get_item'].build.__source__
+    assert "'/users/%s/items/%s' % (to_url_0(value_0), to_url_1(value_1),)" in source
+    assert "return '/'" in router.reverse_lookups['home'].build.__source__
+
+
+def test_lookup_cache():
+    router = Router(routes, cache=LRUCache(2))
+
+    router.lookup('/users/me', 'GET')
+    assert len(router.cache) == 0
+
+    router.lookup('/users/1', 'GET')
+    router.lookup('/users/1', 'GET')
+    router.lookup('/users/2', 'GET')
+    router.lookup('/users/3', 'GET')
+    assert router.cache.stats() == {'maxsize': 2, 'size': 2, 'hits': 1, 'misses': 3, 'evictions': 1}
+
+    with pytest.raises(exceptions.NotFound):
+        router.lookup('/missing', 'GET')
+    assert ('GET', '/missing') not in router.cache
+
+
+def test_app_route_cache(app_class):
+    cache = SegmentedLRUCache(100)
+    app = app_class(routes=routes, route_cache=cache)
+    assert app.router.cache is cache
+    app.router.lookup('/users/123', 'GET')
+    assert ('GET', '/users/123') in cache
+
+    app = app_class(routes=routes)
+    assert type(app.router.cache) is LRUCache
+    assert app.router.cache.maxsize == 10000
+
+
+def test_lru_cache():
+    cache = LRUCache(2)
+    cache['a'] = 1
+    cache['b'] = 2
+    assert cache['a'] == 1
+    cache['c'] = 3
+    assert 'a' in cache
+    assert 'b' not in cache
+    with pytest.raises(KeyError):
+        cache['b']
+    assert cache.stats() == {'maxsize': 2, 'size': 2, 'hits': 1, 'misses': 1, 'evictions': 1}
+
+
+def test_segmented_lru_cache():
+    cache = SegmentedLRUCache(4, protected_ratio=0.5)
+    cache['hot'] = 1
+    assert cache['hot'] == 1
+
+    # Items that are only used once can't push out frequently used ones.
+    for index in range(10):
+        cache['cold:%d' % index] = index
+    assert 'hot' in cache
+    assert cache['hot'] == 1
+    assert len(cache) == 3
+    assert cache.stats()['evictions'] == 8
@@ -1,8 +1,11 @@
+import copy
 import datetime
+import json
+import pickle
 
 import pytest
 
-from apistar import exceptions, types, validators
+from apistar import exceptions, http, types, validators
 from apistar.utils import encode_jsonschema
 
 utc = datetime.timezone.utc
@@ -306,3 +309,186 @@ def test_nested():
             'longitude': -0.1372
         }
     }
+
+
+class Event(types.Type):
+    when = validators.DateTime()
+    dates = validators.Array(items=validators.Date(), default=[])
+    places = validators.Array(items=Place, default=[])
+    home = validators.Object(properties={'place': Place}, default={})
+
+
+def test_serialize():
+    event = Event({
+        'when': '2020-01-01T12:00:00Z',
+        'dates': ['2020-01-01', '2020-01-02'],
+        'places': [
+            {'name': 'Brighton', 'location': {'latitude': 50.8225, 'longitude': -0.1372}},
+        ],
+    })
+    data = event._serialize()
+    assert data == {
+        'when': '2020-01-01T12:00:00Z',
+        'dates': ['2020-01-01', '2020-01-02'],
+        'places': [
+            {'name': 'Brighton', 'location': {'latitude': 50.8225, 'longitude': -0.1372}},
+        ],
+        'home': {},
+    }
+    assert type(data['places'][0]) is dict
+    assert type(data['places'][0]['location']) is dict
+    assert data['when'] == dict(event)['when']
+
+
+def test_serialize_constructed_nested_dicts():
+    when = datetime.datetime(2020, 1, 1, 12, 0, 0, tzinfo=utc)
+    place = {'name': 'Brighton', 'location': {'latitude': 50.8225, 'longitude': -0.1372}}
+    event = Event.construct(when=when, places=[place, Place(place)])
+    assert event._serialize() == {
+        'when': '2020-01-01T12:00:00Z',
+        'dates': [],
+        'places': [place, place],
+        'home': {},
+    }
+
+    place = Place.construct(name='Brighton', location={'latitude': 50.8225, 'longitude': -0.1372})
+    assert place._serialize() == {'name': 'Brighton', 'location': {'latitude': 50.8225, 'longitude': -0.1372}}
+    assert place._serialize()['location'] is place.location
+    response = http.JSONResponse(place)
+    assert json.loads(response.content.decode('utf-8')) == {
+        'name': 'Brighton', 'location': {'latitude': 50.8225, 'longitude': -0.1372}
+    }
+
+
+def test_serialize_nulls():
+    product = Product(
+        name='abc', created=datetime.datetime(2020, 1, 1, tzinfo=utc)
+    )
+    assert product._serialize() == {'name': 'abc', 'rating': None, 'created': '2020-01-01T00:00:00Z'}
+    assert product._serialize() == dict(product)
+    assert types.Type()._serialize() == {}
+
+
+class CompactProduct(types.CompactType):
+    name = validators.String(max_length=10)
+    rating = validators.Integer(allow_null=True, default=None, minimum=0, maximum=100)
+    created = validators.DateTime()
+
+
+class CompactReviewedProduct(CompactProduct):
+    reviewer = validators.String(max_length=20)
+
+
+def test_compact_type():
+    when = datetime.datetime(2020, 1, 1, 12, 0, 0, tzinfo=utc)
+    product = CompactProduct(name='abc', created=when)
+    assert not hasattr(product, '__dict__')
+    assert CompactProduct.__slots__ == ('name', 'rating', 'created')
+
+    assert product.name == 'abc'
+    assert product.rating is None
+    assert product.created == when
+    assert product['created'] == '2020-01-01T12:00:00Z'
+    assert len(product) == 3
+    assert list(product) == ['name', 'rating', 'created']
+    assert dict(product) == {'name': 'abc', 'rating': None, 'created': '2020-01-01T12:00:00Z'}
+    assert product._serialize() == dict(product)
+    assert product == Product(name='abc', created=when)
+    assert repr(product) == "<CompactProduct(name='abc', rating=None, created='2020-01-01T12:00:00Z')>"
+
+    product.rating = 5
+    assert product.rating == 5
+    product['name'] = 'def'
+    assert product.name == 'def'
+    with pytest.raises(exceptions.ValidationError):
+        product.rating = 1000
+    with pytest.raises(AttributeError):
+        product.missing = 1
+    with pytest.raises(AttributeError):
+        product.missing
+    with pytest.raises(KeyError):
+        product['missing'] = 1
+    with pytest.raises(KeyError):
+        product['missing']
+
+    with pytest.raises(exceptions.ValidationError):
+        CompactProduct(name='abc')
+
+
+def test_compact_type_subclass():
+    when = datetime.datetime(2020, 1, 1, 12, 0, 0, tzinfo=utc)
+    product = CompactReviewedProduct(name='abc', created=when, reviewer='xyz')
+    assert not hasattr(product, '__dict__')
+    assert CompactReviewedProduct.__slots__ == ('reviewer',)
+    assert dict(product) == {
+        'name': 'abc', 'rating': None, 'created': '2020-01-01T12:00:00Z', 'reviewer': 'xyz'
+    }
+
+
+@pytest.mark.parametrize('cls', [Product, CompactProduct])
+def test_pickle(cls):
+    when = datetime.datetime(2020, 1, 1, 12, 0, 0, tzinfo=utc)
+    product = cls(name='abc', rating=5, created=when)
+    restored = pickle.loads(pickle.dumps(product))
+    assert type(restored) is cls
+    assert restored == product
+    assert restored.rating == 5
+    assert copy.copy(product) == product
+
+
+@pytest.mark.parametrize('cls', [Product, CompactProduct])
+def test_from_trusted(cls):
+    when = datetime.datetime(2020, 1, 1, 12, 0, 0, tzinfo=utc)
+    product = cls.from_trusted({'created': when, 'name': 'abc', 'extra': 1})
+    assert product == cls(name='abc', created=when)
+    assert list(product) == ['name', 'rating', 'created']
+
+    # Values are not validated.
+    product = cls.construct(name='a' * 20, rating=1000, created=when)
+    assert product.name == 'a' * 20
+    assert product.rating == 1000
+    assert product['created'] == '2020-01-01T12:00:00Z'
+    assert product._serialize() == {'name': 'a' * 20, 'rating': 1000, 'created': '2020-01-01T12:00:00Z'}
+    assert http.JSONResponse(product).content == (
+        b'{"name":"' + b'a' * 20 + b'","rating":1000,"created":"2020-01-01T12:00:00Z"}'
+    )
+
+    with pytest.raises(exceptions.ValidationError) as exc:
+        cls.construct(name='abc')
+    assert exc.value.detail == {'created': 'This field is required.'}
+
+
+@pytest.mark.parametrize('cls', [Product, CompactProduct])
+def test_construct_many(cls):
+    when = datetime.datetime(2020, 1, 1, 12, 0, 0, tzinfo=utc)
+    products = cls.construct_many([('abc', 1, when), ('def', None, when)])
+    assert products == [
+        cls(name='abc', rating=1, created=when),
+        cls(name='def', created=when),
+    ]
+
+    assert [product._serialize() for product in products] == [
+        {'name': 'abc', 'rating': 1, 'created': '2020-01-01T12:00:00Z'},
+        {'name': 'def', 'rating': None, 'created': '2020-01-01T12:00:00Z'},
+    ]
+    assert b''.join(http.JSONArrayResponse(products)) == (
+        b'[{"name":"abc","rating":1,"created":"2020-01-01T12:00:00Z"},'
+        b'{"name":"def","rating":null,"created":"2020-01-01T12:00:00Z"}]'
+    )
+
+    products = cls.construct_many([(when, 'abc')], fields=['created', 'name'])
+    assert products == [cls(name='abc', created=when)]
+    assert cls.construct_many([]) == []
+
+    with pytest.raises(exceptions.ConfigurationError):
+        cls.construct_many([('abc',)], fields=['name'])
+    with pytest.raises(exceptions.ConfigurationError):
+        cls.construct_many([('abc',)], fields=['missing'])
+
+
+def test_construct_many_nested_dicts():
+    places = Place.construct_many([({'latitude': 50.8225, 'longitude': -0.1372}, 'Brighton')])
+    assert places[0].location == {'latitude': 50.8225, 'longitude': -0.1372}
+    assert json.loads(b''.join(http.JSONArrayResponse(places)).decode('utf-8')) == [
+        {'name': 'Brighton', 'location': {'latitude': 50.8225, 'longitude': -0.1372}}
+    ]
@@ -1,5 +1,6 @@
 from apistar import Route, test, types, validators
 from apistar.server.app import App
+from apistar.server.components import Component
 
 
 def str_path_param(param: str):
@@ -97,6 +98,10 @@ def test_int_query_param():
     response = client.get('/int_query_param/')
     assert response.json() == {'param': 'The "param" field is required.'}
 
+    response = client.get('/int_query_param/?param=abc')
+    assert response.status_code == 400
+    assert response.json() == {'param': 'Must be a number.'}
+
 
 def test_int_query_param_with_default():
     response = client.get('/int_query_param_with_default/?param=123')
@@ -139,3 +144,52 @@ def test_type_body_param():
     response = client.post('/type_body_param/', json={})
     assert response.status_code == 400
     assert response.json() == {'name': 'The "name" field is required.'}
+
+
+def test_validators_are_not_rebuilt_per_request():
+    client.get('/int_path_param/123/')
+    counter = validators.Validator._creation_counter
+    response = client.get('/int_path_param/456/')
+    assert response.json() == {'param': 456}
+    response = client.get('/str_query_param/?param=123')
+    assert response.json() == {'param': '123'}
+    assert validators.Validator._creation_counter == counter
+
+
+class RouteName(str):
+    pass
+
+
+class RouteNameComponent(Component):
+    def __init__(self):
+        self.built = []
+
+    def prepare(self, route: Route):
+        route.get_artifact(self, self.build)
+
+    def build(self, route: Route):
+        self.built.append(route.name)
+        return RouteName(route.name.upper())
+
+    def resolve(self, route: Route) -> RouteName:
+        return route.get_artifact(self, self.build)
+
+
+def route_name(name: RouteName):
+    return {'name': name}
+
+
+def test_route_artifacts():
+    component = RouteNameComponent()
+    app = App(
+        routes=[Route(url='/route_name/', method='GET', handler=route_name)],
+        components=[component]
+    )
+    assert 'route_name' in component.built
+
+    client = test.TestClient(app)
+    response = client.get('/route_name/')
+    assert response.json() == {'name': 'ROUTE_NAME'}
+    response = client.get('/route_name/')
+    assert response.json() == {'name': 'ROUTE_NAME'}
+    assert component.built.count('route_name') == 1